@@ -1,13 +1,48 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, Any, List, Optional
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Literal, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import itertools
+import math
+import os
+import time
+import uuid
 import uvicorn
 
-from models.ml_models import MLModelTrainer
-from utils.dataset_loader import DatasetLoader
+from models import tasks
+from models.registry import ModelRegistry
+from utils.jobs import JobManager
+from utils.metrics import MetricsRegistry
+from utils.payload import dumps, loads, merge_objects
+from utils.result_cache import ResultCache
+from utils.single_flight import SingleFlight
+from utils.worker_pool import PoolSaturatedError, TrainingPool
 
-app = FastAPI(title="Algorithm Visualizer API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Workers build their own datasets; when training in-process, build the
+    # default-sized ones in the background so startup is not delayed
+    if training_pool.max_workers == 0:
+        asyncio.create_task(run_in_threadpool(dataset_loader.warm))
+    job_manager.listen(training_pool.events)
+    # Pre-train the default configurations in the background; the app
+    # serves requests (and /health) meanwhile
+    prewarm_task = None
+    if prewarm_seconds > 0:
+        prewarm_task = asyncio.create_task(prewarm_cache(prewarm_seconds, prewarm_max_bytes))
+    yield
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    training_pool.shutdown()
+    training_pool.events.put(None)
+
+
+app = FastAPI(title="Algorithm Visualizer API", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -19,14 +54,143 @@ app.add_middleware(
 )
 
 
-dataset_loader = DatasetLoader()
-model_trainer = MLModelTrainer()
+# Shared with the in-process fallback used when TRAIN_WORKERS=0
+dataset_loader = tasks.dataset_loader
+dataset_store = tasks.dataset_store
+model_trainer = tasks.model_trainer
+training_pool = TrainingPool(
+    max_workers=int(os.environ["TRAIN_WORKERS"]) if "TRAIN_WORKERS" in os.environ else None,
+    max_pending=int(os.environ.get("TRAIN_QUEUE_DEPTH", 0)) or None,
+    preload=tasks.PRELOAD_MODULES,
+    initializer=tasks.init_worker
+)
+job_manager = JobManager(
+    max_bytes=int(os.environ.get("JOB_EVENTS_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.environ.get("JOB_TTL", 300))
+)
+# Job training each key in a worker, for identical jobs to follow
+running_jobs = {}
+# Jobs waiting on a /train run; referenced so they are not garbage collected
+job_tasks = set()
+result_cache_dir = os.environ.get("RESULT_CACHE_DIR") or None
+model_registry = ModelRegistry(
+    max_bytes=int(os.environ.get("MODEL_REGISTRY_MAX_BYTES", 512 * 1024 * 1024)),
+    # Cached responses name their model, so persist models alongside them
+    directory=os.environ.get("MODEL_REGISTRY_DIR") or (
+        os.path.join(result_cache_dir, "models") if result_cache_dir else None
+    )
+)
+upload_max_bytes = int(os.environ.get("UPLOAD_MAX_BYTES", 2 * 1024 ** 3))
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get("RESULT_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+    directory=result_cache_dir,
+    disk_max_bytes=int(os.environ.get("RESULT_CACHE_DISK_MAX_BYTES", 1024 ** 3))
+)
+# Boundary tiles are cheap to keep and often re-requested while panning
+tile_cache = ResultCache(max_bytes=int(os.environ.get("TILE_CACHE_MAX_BYTES", 64 * 1024 * 1024)))
+# Identical trainings requested while one is running wait for it instead
+train_flights = SingleFlight()
+# Startup pre-training of default configurations; 0 seconds disables it
+prewarm_seconds = float(os.environ.get("PREWARM_SECONDS", 0))
+prewarm_max_bytes = int(os.environ.get("PREWARM_MAX_BYTES", 64 * 1024 * 1024))
+prewarm_state = {"status": "disabled", "entries": 0, "bytes": 0}
+
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    "dataviz_train_stage_seconds", "Seconds spent in each stage of a training run",
+    labels=("algorithm", "dataset", "stage"),
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+response_bytes = metrics.histogram(
+    "dataviz_train_response_bytes", "Size of serialized training responses",
+    labels=("algorithm", "dataset"),
+    buckets=(1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+)
+metrics.stats_gauges("dataviz_result_cache", "Result cache", result_cache.stats)
+metrics.stats_gauges("dataviz_tile_cache", "Boundary tile cache", tile_cache.stats)
+metrics.stats_gauges("dataviz_pool", "Training worker pool", training_pool.stats)
+metrics.stats_gauges("dataviz_model_registry", "Fitted model registry", model_registry.stats)
+metrics.stats_gauges("dataviz_jobs", "Training jobs", job_manager.stats)
+metrics.stats_gauges("dataviz_train_flights", "Coalesced /train and /jobs requests", train_flights.stats)
+
+
+def _record_training(algorithm: str, dataset: str, timings: dict, size: int):
+    """Add a finished training run to the metrics"""
+    # Uploads are keyed by content hash; one label keeps cardinality bounded
+    if dataset in dataset_store:
+        dataset = "upload"
+    for stage, seconds in timings.items():
+        stage_seconds.observe(seconds, algorithm=algorithm, dataset=dataset, stage=stage)
+    response_bytes.observe(size, algorithm=algorithm, dataset=dataset)
 
 
 class TrainRequest(BaseModel):
     algorithm: str
     dataset: str
     parameters: Dict[str, Any]
+    # Size of synthetic datasets; bundled datasets keep their own size
+    n_samples: int = Field(300, ge=10, le=1_000_000)
+    # Max mesh points per axis for the decision boundary
+    boundary_resolution: Optional[int] = Field(None, ge=10, le=1000)
+    # "compact" sends mesh axes and base64-packed class grids instead of nested lists
+    boundary_format: Literal["grid", "compact"] = "grid"
+    # Add top-class probability and margin surfaces for confidence shading
+    boundary_confidence: bool = False
+    # Max data points sent for plotting (default PLOT_POINT_BUDGET); larger
+    # datasets are sampled and training/test data refer to the sample
+    point_budget: Optional[int] = Field(None, ge=10, le=1_000_000)
+    # Train on every feature instead of the first two; the boundary is then
+    # drawn on a 2-D PCA projection
+    all_features: bool = False
+    # Learning curves cost ~30 extra fits; skip them here and fetch them from
+    # /learning-curves when needed
+    include_learning_curves: bool = True
+    # Tree export: which random_forest/extra_trees estimator, how deep, and
+    # "records" (nodes + edges) or "columnar" (parallel arrays)
+    tree_estimator: Optional[int] = Field(None, ge=0)
+    tree_max_depth: Optional[int] = Field(None, ge=0)
+    tree_format: Literal["records", "columnar"] = "records"
+    # Keep the fitted model for /predict; its id is returned as model_id
+    keep_model: bool = True
+    # Add a "timings" block with the seconds spent in each stage
+    include_timings: bool = False
+
+
+class Viewport(BaseModel):
+    # Feature ranges to evaluate; default to the model's training extent
+    x_range: Optional[List[float]] = Field(None, min_length=2, max_length=2)
+    y_range: Optional[List[float]] = Field(None, min_length=2, max_length=2)
+    resolution: Optional[int] = Field(None, ge=10, le=1000)
+    # Add confidence and margin surfaces from the class probabilities
+    confidence: bool = False
+
+
+class PredictRequest(BaseModel):
+    model_id: str
+    # Either a batch of [x, y] points or a viewport to evaluate as a mesh
+    points: Optional[List[List[float]]] = Field(None, max_length=100_000)
+    viewport: Optional[Viewport] = None
+    probabilities: bool = False
+    boundary_format: Literal["grid", "compact"] = "grid"
+
+
+class BatchTrainRequest(BaseModel):
+    algorithm: str
+    dataset: str
+    n_samples: int = Field(300, ge=10, le=1_000_000)
+    # Explicit parameter sets, each combined with every point of the grid
+    parameter_sets: List[Dict[str, Any]] = []
+    grid: Dict[str, List[Any]] = {}
+    include_boundaries: bool = False
+    boundary_resolution: Optional[int] = Field(None, ge=10, le=1000)
+    boundary_format: Literal["grid", "compact"] = "grid"
+    point_budget: Optional[int] = Field(None, ge=10, le=1_000_000)
+    all_features: bool = False
+
+
+MAX_BATCH_CONFIGS = 64
+# Stages a training job streams, in order; each after metrics is one response field
+JOB_STAGES = ("metrics", "decision_boundary", "learning_curves", "tree_structure")
 
 
 @app.get("/")
@@ -39,213 +203,693 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/cache")
+def cache_stats():
+    """Get result cache counters"""
+    return {**result_cache.stats(), "prewarm": prewarm_state, "coalescing": train_flights.stats()}
+
+
+@app.get("/pool")
+def pool_stats():
+    """Get training worker pool occupancy"""
+    return training_pool.stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Stage timings, response sizes and cache/pool gauges for Prometheus"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/models")
+def registry_stats():
+    """Get fitted model registry usage"""
+    return model_registry.stats()
+
+
 @app.get("/datasets")
 def get_datasets():
     """Get available datasets"""
-    return {
-        "datasets": [
-            {"id": "moons", "name": "Moons", "type": "classification", "samples": 300},
-            {"id": "circles", "name": "Circles", "type": "classification", "samples": 300},
-            {"id": "iris", "name": "Iris", "type": "classification", "samples": 150},
-            {"id": "wine", "name": "Wine Quality", "type": "classification", "samples": 178},
-            {"id": "breast_cancer", "name": "Breast Cancer", "type": "classification", "samples": 569},
-            {"id": "blobs", "name": "Blobs", "type": "classification", "samples": 300},
-            {"id": "classification", "name": "Random Classification", "type": "classification", "samples": 300},
-            {"id": "linear", "name": "Linear Regression", "type": "regression", "samples": 300}
+    return {"datasets": DATASETS}
+
+
+DATASETS = [
+    {"id": "moons", "name": "Moons", "type": "classification", "samples": 300},
+    {"id": "circles", "name": "Circles", "type": "classification", "samples": 300},
+    {"id": "iris", "name": "Iris", "type": "classification", "samples": 150},
+    {"id": "wine", "name": "Wine Quality", "type": "classification", "samples": 178},
+    {"id": "breast_cancer", "name": "Breast Cancer", "type": "classification", "samples": 569},
+    {"id": "blobs", "name": "Blobs", "type": "classification", "samples": 300},
+    {"id": "classification", "name": "Random Classification", "type": "classification", "samples": 300},
+    {"id": "linear", "name": "Linear Regression", "type": "regression", "samples": 300}
+]
+
+
+# Algorithms with their tunable parameters; also used to validate batch grids
+ALGORITHMS = [
+    {
+        "id": "logistic_regression",
+        "name": "Logistic Regression",
+        "type": "classification",
+        "parameters": [
+            {"name": "C", "type": "slider", "min": 0.01, "max": 10, "default": 1.0, "step": 0.1},
+            {"name": "max_iter", "type": "slider", "min": 100, "max": 2000, "default": 200, "step": 100},
+            {"name": "solver", "type": "dropdown", "options": ["lbfgs", "liblinear", "newton-cg", "sag", "saga"], "default": "lbfgs"},
+            {"name": "penalty", "type": "dropdown", "options": ["l2", "none"], "default": "l2"},
+            {"name": "tol", "type": "slider", "min": 0.0001, "max": 0.01, "default": 0.0001, "step": 0.0001}
+        ]
+    },
+    {
+        "id": "knn",
+        "name": "K-Nearest Neighbors",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_neighbors", "type": "slider", "min": 1, "max": 30, "default": 5, "step": 1},
+            {"name": "weights", "type": "dropdown", "options": ["uniform", "distance"], "default": "uniform"},
+            {"name": "algorithm", "type": "dropdown", "options": ["auto", "ball_tree", "kd_tree", "brute"], "default": "auto"},
+            {"name": "leaf_size", "type": "slider", "min": 10, "max": 50, "default": 30, "step": 5},
+            {"name": "p", "type": "slider", "min": 1, "max": 3, "default": 2, "step": 1}
+        ]
+    },
+    {
+        "id": "decision_tree",
+        "name": "Decision Tree",
+        "type": "classification",
+        "parameters": [
+            {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 5, "step": 1},
+            {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
+            {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 20, "default": 1, "step": 1},
+            {"name": "criterion", "type": "dropdown", "options": ["gini", "entropy", "log_loss"], "default": "gini"},
+            {"name": "splitter", "type": "dropdown", "options": ["best", "random"], "default": "best"},
+            {"name": "max_features", "type": "dropdown", "options": ["sqrt", "log2", "None"], "default": "None"}
+        ]
+    },
+    {
+        "id": "random_forest",
+        "name": "Random Forest",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
+            {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 10, "step": 1},
+            {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
+            {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 10, "default": 1, "step": 1},
+            {"name": "criterion", "type": "dropdown", "options": ["gini", "entropy", "log_loss"], "default": "gini"},
+            {"name": "max_features", "type": "dropdown", "options": ["sqrt", "log2", "None"], "default": "sqrt"},
+            {"name": "bootstrap", "type": "dropdown", "options": ["True", "False"], "default": "True"}
+        ]
+    },
+    {
+        "id": "svm",
+        "name": "Support Vector Machine",
+        "type": "classification",
+        "parameters": [
+            {"name": "C", "type": "slider", "min": 0.01, "max": 100, "default": 1.0, "step": 0.5},
+            {"name": "kernel", "type": "dropdown", "options": ["linear", "rbf", "poly", "sigmoid"], "default": "rbf"},
+            {"name": "gamma", "type": "dropdown", "options": ["scale", "auto"], "default": "scale"},
+            {"name": "degree", "type": "slider", "min": 2, "max": 5, "default": 3, "step": 1},
+            {"name": "tol", "type": "slider", "min": 0.0001, "max": 0.01, "default": 0.001, "step": 0.0001},
+            {"name": "max_iter", "type": "slider", "min": 100, "max": 2000, "default": 1000, "step": 100}
+        ]
+    },
+    {
+        "id": "gradient_boosting",
+        "name": "Gradient Boosting",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
+            {"name": "learning_rate", "type": "slider", "min": 0.01, "max": 1.0, "default": 0.1, "step": 0.01},
+            {"name": "max_depth", "type": "slider", "min": 1, "max": 10, "default": 3, "step": 1},
+            {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
+            {"name": "subsample", "type": "slider", "min": 0.5, "max": 1.0, "default": 1.0, "step": 0.1}
+        ]
+    },
+    {
+        "id": "adaboost",
+        "name": "AdaBoost",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_estimators", "type": "slider", "min": 10, "max": 200, "default": 50, "step": 10},
+            {"name": "learning_rate", "type": "slider", "min": 0.01, "max": 2.0, "default": 1.0, "step": 0.1}
+        ]
+    },
+    {
+        "id": "extra_trees",
+        "name": "Extra Trees",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
+            {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 10, "step": 1},
+            {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
+            {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 10, "default": 1, "step": 1}
+        ]
+    },
+    {
+        "id": "bagging",
+        "name": "Bagging Classifier",
+        "type": "classification",
+        "parameters": [
+            {"name": "n_estimators", "type": "slider", "min": 10, "max": 200, "default": 10, "step": 10},
+            {"name": "max_samples", "type": "slider", "min": 0.1, "max": 1.0, "default": 1.0, "step": 0.1},
+            {"name": "max_features", "type": "slider", "min": 0.1, "max": 1.0, "default": 1.0, "step": 0.1}
+        ]
+    },
+    {
+        "id": "linear_regression",
+        "name": "Linear Regression",
+        "type": "regression",
+        "parameters": [
+            {"name": "fit_intercept", "type": "dropdown", "options": ["True", "False"], "default": "True"},
+            {"name": "positive", "type": "dropdown", "options": ["False", "True"], "default": "False"}
         ]
     }
+]
 
 
 @app.get("/algorithms")
 def get_algorithms():
     """Get available algorithms with their parameters"""
-    return {
-        "algorithms": [
-            {
-                "id": "logistic_regression",
-                "name": "Logistic Regression",
-                "type": "classification",
-                "parameters": [
-                    {"name": "C", "type": "slider", "min": 0.01, "max": 10, "default": 1.0, "step": 0.1},
-                    {"name": "max_iter", "type": "slider", "min": 100, "max": 2000, "default": 200, "step": 100},
-                    {"name": "solver", "type": "dropdown", "options": ["lbfgs", "liblinear", "newton-cg", "sag", "saga"], "default": "lbfgs"},
-                    {"name": "penalty", "type": "dropdown", "options": ["l2", "none"], "default": "l2"},
-                    {"name": "tol", "type": "slider", "min": 0.0001, "max": 0.01, "default": 0.0001, "step": 0.0001}
-                ]
-            },
-            {
-                "id": "knn",
-                "name": "K-Nearest Neighbors",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_neighbors", "type": "slider", "min": 1, "max": 30, "default": 5, "step": 1},
-                    {"name": "weights", "type": "dropdown", "options": ["uniform", "distance"], "default": "uniform"},
-                    {"name": "algorithm", "type": "dropdown", "options": ["auto", "ball_tree", "kd_tree", "brute"], "default": "auto"},
-                    {"name": "leaf_size", "type": "slider", "min": 10, "max": 50, "default": 30, "step": 5},
-                    {"name": "p", "type": "slider", "min": 1, "max": 3, "default": 2, "step": 1}
-                ]
-            },
-            {
-                "id": "decision_tree",
-                "name": "Decision Tree",
-                "type": "classification",
-                "parameters": [
-                    {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 5, "step": 1},
-                    {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
-                    {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 20, "default": 1, "step": 1},
-                    {"name": "criterion", "type": "dropdown", "options": ["gini", "entropy", "log_loss"], "default": "gini"},
-                    {"name": "splitter", "type": "dropdown", "options": ["best", "random"], "default": "best"},
-                    {"name": "max_features", "type": "dropdown", "options": ["sqrt", "log2", "None"], "default": "None"}
-                ]
-            },
-            {
-                "id": "random_forest",
-                "name": "Random Forest",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
-                    {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 10, "step": 1},
-                    {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
-                    {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 10, "default": 1, "step": 1},
-                    {"name": "criterion", "type": "dropdown", "options": ["gini", "entropy", "log_loss"], "default": "gini"},
-                    {"name": "max_features", "type": "dropdown", "options": ["sqrt", "log2", "None"], "default": "sqrt"},
-                    {"name": "bootstrap", "type": "dropdown", "options": ["True", "False"], "default": "True"}
-                ]
-            },
-            {
-                "id": "svm",
-                "name": "Support Vector Machine",
-                "type": "classification",
-                "parameters": [
-                    {"name": "C", "type": "slider", "min": 0.01, "max": 100, "default": 1.0, "step": 0.5},
-                    {"name": "kernel", "type": "dropdown", "options": ["linear", "rbf", "poly", "sigmoid"], "default": "rbf"},
-                    {"name": "gamma", "type": "dropdown", "options": ["scale", "auto"], "default": "scale"},
-                    {"name": "degree", "type": "slider", "min": 2, "max": 5, "default": 3, "step": 1},
-                    {"name": "tol", "type": "slider", "min": 0.0001, "max": 0.01, "default": 0.001, "step": 0.0001},
-                    {"name": "max_iter", "type": "slider", "min": 100, "max": 2000, "default": 1000, "step": 100}
-                ]
-            },
-            {
-                "id": "gradient_boosting",
-                "name": "Gradient Boosting",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
-                    {"name": "learning_rate", "type": "slider", "min": 0.01, "max": 1.0, "default": 0.1, "step": 0.01},
-                    {"name": "max_depth", "type": "slider", "min": 1, "max": 10, "default": 3, "step": 1},
-                    {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
-                    {"name": "subsample", "type": "slider", "min": 0.5, "max": 1.0, "default": 1.0, "step": 0.1}
-                ]
-            },
-            {
-                "id": "adaboost",
-                "name": "AdaBoost",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_estimators", "type": "slider", "min": 10, "max": 200, "default": 50, "step": 10},
-                    {"name": "learning_rate", "type": "slider", "min": 0.01, "max": 2.0, "default": 1.0, "step": 0.1}
-                ]
-            },
-            {
-                "id": "extra_trees",
-                "name": "Extra Trees",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_estimators", "type": "slider", "min": 10, "max": 300, "default": 100, "step": 10},
-                    {"name": "max_depth", "type": "slider", "min": 1, "max": 30, "default": 10, "step": 1},
-                    {"name": "min_samples_split", "type": "slider", "min": 2, "max": 20, "default": 2, "step": 1},
-                    {"name": "min_samples_leaf", "type": "slider", "min": 1, "max": 10, "default": 1, "step": 1}
-                ]
-            },
-            {
-                "id": "bagging",
-                "name": "Bagging Classifier",
-                "type": "classification",
-                "parameters": [
-                    {"name": "n_estimators", "type": "slider", "min": 10, "max": 200, "default": 10, "step": 10},
-                    {"name": "max_samples", "type": "slider", "min": 0.1, "max": 1.0, "default": 1.0, "step": 0.1},
-                    {"name": "max_features", "type": "slider", "min": 0.1, "max": 1.0, "default": 1.0, "step": 0.1}
-                ]
-            },
-            {
-                "id": "linear_regression",
-                "name": "Linear Regression",
-                "type": "regression",
-                "parameters": [
-                    {"name": "fit_intercept", "type": "dropdown", "options": ["True", "False"], "default": "True"},
-                    {"name": "positive", "type": "dropdown", "options": ["False", "True"], "default": "False"}
-                ]
-            }
-        ]
-    }
+    return {"algorithms": ALGORITHMS}
+
+
+def _validate_parameters(algorithm: str, parameters: dict):
+    """Check parameter values against the /algorithms schema"""
+    schema = next((a for a in ALGORITHMS if a["id"] == algorithm), None)
+    if schema is None:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    
+    specs = {spec["name"]: spec for spec in schema["parameters"]}
+    for name, value in parameters.items():
+        spec = specs.get(name)
+        if spec is None:
+            raise ValueError(f"Unknown parameter for {algorithm}: {name}")
+        if spec["type"] == "slider":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                    or not spec["min"] <= value <= spec["max"]:
+                raise ValueError(f"{name} must be a number between {spec['min']} and {spec['max']}")
+        elif str(value) not in spec["options"]:
+            raise ValueError(f"{name} must be one of {spec['options']}")
+
+
+def _expand_parameter_sets(parameter_sets: list, grid: dict) -> list:
+    """Combine explicit parameter sets with every point of a grid"""
+    base_sets = parameter_sets or [{}]
+    count = len(base_sets) * math.prod(len(values) for values in grid.values())
+    if count > MAX_BATCH_CONFIGS:
+        raise ValueError(f"Batch has {count} configurations, the limit is {MAX_BATCH_CONFIGS}")
+    
+    names = list(grid)
+    combinations = list(itertools.product(*(grid[name] for name in names)))
+    return [
+        {**base, **dict(zip(names, combination))}
+        for base in base_sets
+        for combination in combinations
+    ]
 
 
 @app.post("/upload-dataset")
 async def upload_dataset(file: UploadFile = File(...)):
     """Upload custom CSV dataset"""
     try:
-        content = await file.read()
-        content_str = content.decode('utf-8')
+        # Load and validate dataset, parsing the spooled upload off the event loop.
+        # Every feature is stored; /train picks the first two unless
+        # all_features is set.
+        X, y = await run_in_threadpool(
+            dataset_loader.load_custom_file, file.file, upload_max_bytes, all_features=True
+        )
         
-        # Load and validate dataset
-        X, y = dataset_loader.load_custom_dataset(content_str)
+        # Keep it server-side so /train can use it by id without a re-upload
+        dataset_id = await run_in_threadpool(dataset_store.put, X, y)
         
         return {
             "success": True,
             "message": "Dataset uploaded successfully",
             "samples": len(X),
             "features": X.shape[1],
-            "dataset_id": "custom"
+            "dataset_id": dataset_id
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing CSV: {str(e)}")
 
 
+def _train_key(request: TrainRequest):
+    """Cache key and trainer options of a training request"""
+    options = request.model_dump(
+        exclude={"algorithm", "dataset", "parameters", "n_samples", "keep_model"}
+    )
+    # Datasets are deterministic or content-addressed, so identical
+    # requests share a result
+    key = model_trainer.request_key(
+        request.algorithm, request.dataset, request.parameters,
+        n_samples=request.n_samples, keep_model=request.keep_model, **options
+    )
+    return key, options
+
+
+async def _train_and_cache(request: TrainRequest, key: str, options: dict) -> bytes:
+    """Train in a worker, keep the fitted model and cache the response
+
+    Concurrent calls with the same key share a single training run.
+    """
+    return await train_flights.run(key, lambda: _train_in_worker(request, key, options))
+
+
+async def _train_in_worker(request: TrainRequest, key: str, options: dict) -> bytes:
+    model_id = key if request.keep_model else None
+    body, packed_model, timings = await training_pool.run(
+        tasks.train_builtin,
+        request.algorithm,
+        request.dataset,
+        request.n_samples,
+        request.parameters,
+        options,
+        model_id,
+        model_registry.max_model_bytes
+    )
+    _store_training(request, key, body, packed_model, timings)
+    return body
+
+
+def _store_training(request: TrainRequest, key: str, body: bytes, packed_model, timings: dict):
+    """Record a finished training, keep its fitted model and cache its response"""
+    _record_training(request.algorithm, request.dataset, timings, len(body))
+    
+    if packed_model is not None:
+        model_registry.put(key, packed_model)
+    elif request.keep_model:
+        # Too large for the registry; the response was sent without model_id
+        model_registry.decline(key)
+    result_cache.put(key, body)
+
+
+def _cached_training(request: TrainRequest, key: str):
+    """Cached response of a training request, or None when it has to be trained
+
+    A response names its fitted model, so it is only served while the
+    registry still holds that model; otherwise it counts as a miss and
+    training again registers it.
+    """
+    if request.keep_model and key not in model_registry and not model_registry.declined(key):
+        result_cache.record_miss()
+        return None
+    return result_cache.get(key)
+
+
+def _client_defaults(algorithm: dict) -> dict:
+    """Default parameters of an algorithm as a browser sends them back
+
+    JSON from JavaScript has no integral floats (1.0 arrives as 1), and the
+    cache key has to match what clients actually send.
+    """
+    return {
+        p["name"]: int(p["default"]) if isinstance(p["default"], float) and p["default"].is_integer()
+        else p["default"]
+        for p in algorithm["parameters"]
+    }
+
+
+async def prewarm_cache(seconds: float, max_bytes: int):
+    """Cache responses for the defaults of every algorithm on every built-in dataset
+
+    Runs one training at a time, datasets in listing order, until every pair
+    is cached or the time or size budget is spent.
+    """
+    deadline = time.monotonic() + seconds
+    prewarm_state["status"] = "running"
+    for dataset in DATASETS:
+        for algorithm in ALGORITHMS:
+            if time.monotonic() > deadline or prewarm_state["bytes"] >= max_bytes:
+                prewarm_state["status"] = "budget exhausted"
+                return
+            
+            # The web client trains through /jobs with compact boundaries
+            request = TrainRequest(
+                algorithm=algorithm["id"],
+                dataset=dataset["id"],
+                parameters=_client_defaults(algorithm),
+                boundary_format="compact"
+            )
+            key, options = _train_key(request)
+            try:
+                body = _cached_training(request, key) or await _train_and_cache(request, key, options)
+            except PoolSaturatedError:
+                # Leave the workers to real traffic and move on
+                await asyncio.sleep(1)
+                continue
+            except Exception:
+                # e.g. a classifier on the regression dataset
+                continue
+            prewarm_state["entries"] += 1
+            prewarm_state["bytes"] += len(body)
+    prewarm_state["status"] = "done"
+
+
 @app.post("/train")
 async def train_model(request: TrainRequest):
     """Train model and return visualization data"""
     try:
-        # Load dataset
-        X, y = dataset_loader.load_dataset(request.dataset)
+        key, options = _train_key(request)
+        cached = _cached_training(request, key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        # Load dataset and train model in a worker process
+        body = await _train_and_cache(request, key, options)
+        return Response(content=body, media_type="application/json")
+    
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _batch_parts(parameter_sets: list, n_parts: int) -> list:
+    """Split parameter sets into at most n_parts contiguous, even parts"""
+    size = max(math.ceil(len(parameter_sets) / n_parts), 1)
+    return [parameter_sets[i:i + size] for i in range(0, len(parameter_sets), size)] or [parameter_sets]
+
+
+@app.post("/train-batch")
+async def train_batch(request: BatchTrainRequest):
+    """Train one algorithm over many parameter sets on a shared split and mesh"""
+    try:
+        parameter_sets = _expand_parameter_sets(request.parameter_sets, request.grid)
+        for parameters in parameter_sets:
+            _validate_parameters(request.algorithm, parameters)
         
-        # Train model
-        result = model_trainer.train(
-            algorithm=request.algorithm,
-            X=X,
-            y=y,
-            parameters=request.parameters
+        options = request.model_dump(
+            include={
+                "include_boundaries", "boundary_resolution", "boundary_format",
+                "point_budget", "all_features"
+            }
         )
+        key = model_trainer.request_key(
+            request.algorithm, request.dataset, {},
+            n_samples=request.n_samples, parameter_sets=parameter_sets, **options
+        )
+        cached = result_cache.get(key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        # Spread the configurations over the workers in contiguous parts;
+        # each part splits the data and builds the mesh once for itself
+        parts = _batch_parts(parameter_sets, max(training_pool.max_workers, 1))
+        bodies = await asyncio.gather(*(
+            training_pool.run(
+                tasks.train_batch,
+                request.algorithm,
+                request.dataset,
+                request.n_samples,
+                part,
+                # The shared data points only need to be sent once
+                options if i == 0 else {**options, "include_points": False}
+            )
+            for i, part in enumerate(parts)
+        ))
+        if len(bodies) == 1:
+            body = bodies[0]
+        else:
+            batch = loads(bodies[0])
+            batch["results"] = [result for part in bodies for result in loads(part)["results"]]
+            body = dumps(batch)
         
-        return result
+        result_cache.put(key, body)
+        return Response(content=body, media_type="application/json")
     
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/learning-curves")
+async def get_learning_curves(request: TrainRequest):
+    """Compute learning curves for a model configuration"""
+    try:
+        key = model_trainer.request_key(
+            request.algorithm, request.dataset, request.parameters,
+            n_samples=request.n_samples, all_features=request.all_features, stage="learning_curves"
+        )
+        cached = result_cache.get(key)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+
+        body = await training_pool.run(
+            tasks.learning_curves_builtin,
+            request.algorithm,
+            request.dataset,
+            request.n_samples,
+            request.parameters,
+            request.all_features
+        )
+
+        result_cache.put(key, body)
+        return Response(content=body, media_type="application/json")
+
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/jobs")
+async def create_job(request: TrainRequest):
+    """Start a training job whose stages are streamed from /jobs/{job_id}/events
+
+    Identical jobs and /train requests arriving while one is training share
+    its run: jobs started after another job mirror its events, and jobs
+    joining a /train run replay its response once it is done.
+    """
+    key, options = _train_key(request)
+    job = job_manager.create()
+
+    # Replay a cached /train response (e.g. a pre-warmed default) as stages
+    cached = _cached_training(request, key)
+    if cached is not None:
+        _replay_stages(job, cached)
+        return job.info()
+
+    def start():
+        future = training_pool.submit(
+            tasks.train_job,
+            job.id,
+            request.algorithm,
+            request.dataset,
+            request.n_samples,
+            request.parameters,
+            options,
+            key if request.keep_model else None,
+            model_registry.max_model_bytes
+        )
+        running_jobs[key] = job
+        return _finish_job(job, request, key, future)
+
+    try:
+        shared = train_flights.run(key, start)
+    except PoolSaturatedError as e:
+        job_manager.publish(job.id, "error", dumps({"detail": str(e)}))
+        raise HTTPException(status_code=503, detail=str(e))
+
+    leader = running_jobs.get(key)
+    if leader is None:
+        task = asyncio.create_task(_replay_when_done(job, shared))
+        job_tasks.add(task)
+        task.add_done_callback(job_tasks.discard)
+    elif leader is not job:
+        job_manager.follow(job, leader)
+    return job.info()
+
+
+def _replay_stages(job, body: bytes):
+    """Publish a finished /train response as the stage events of a job"""
+    result = loads(body)
+    stages = {stage: {stage: result.pop(stage, None)} for stage in JOB_STAGES[1:]}
+    timings = result.pop("timings", None)
+    job_manager.publish(job.id, "metrics", dumps(result))
+    for stage, stage_body in stages.items():
+        job_manager.publish(job.id, stage, dumps(stage_body))
+    done = {"success": True}
+    if timings is not None:
+        done["timings"] = timings
+    job_manager.publish(job.id, "done", dumps(done))
+
+
+async def _replay_when_done(job, shared):
+    """Publish the response of a /train run a job joined once it is ready"""
+    try:
+        body = await shared
+    except Exception as e:
+        job_manager.publish(job.id, "error", dumps({"detail": str(e)}))
+        return
+    _replay_stages(job, body)
+
+
+async def _finish_job(job, request: TrainRequest, key: str, future) -> bytes:
+    """Store a job's training like /train does, then publish its done event
+
+    The response is assembled from the stage bodies the worker published,
+    so the cached result (and what coalesced /train callers receive) is the
+    one /train would have returned.
+    """
+    try:
+        packed_model, timings = await future
+        # Stage events travel on their own queue and may still be in flight
+        await job_manager.wait(job, len(JOB_STAGES))
+        bodies = [body for _, body in job.events]
+        if request.include_timings:
+            bodies.append(dumps({"timings": timings}))
+        body = merge_objects(bodies)
+        _store_training(request, key, body, packed_model, timings)
+    except Exception as e:
+        job_manager.publish(job.id, "error", dumps({"detail": str(e)}))
+        raise
+    finally:
+        running_jobs.pop(key, None)
+
+    done = {"success": True}
+    if request.include_timings:
+        done["timings"] = timings
+    job_manager.publish(job.id, "done", dumps(done))
+    return body
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Get job status and completed stages"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.info()
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Stream job stages as Server-Sent Events"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    if job.released:
+        raise HTTPException(status_code=404, detail=f"Events of job {job_id} were already streamed")
+
+    async def events():
+        async for stage, body in job_manager.stream(job):
+            yield b"event: " + stage.encode() + b"\ndata: " + body + b"\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+async def _run_with_model(fn, model_id: str, *args):
+    """Run fn(model_id, source, *args) in a worker with a registered model
+
+    Workers keep recently used models unpacked, so the packed model is
+    only sent when the worker does not hold it and it is not on disk.
+    """
+    try:
+        return await training_pool.run(fn, model_id, model_registry.file(model_id), *args)
+    except tasks.ModelNotLoaded:
+        packed_model = model_registry.get(model_id)
+        if packed_model is None:
+            raise HTTPException(status_code=404, detail="Model not found; train it again")
+        return await training_pool.run(fn, model_id, packed_model, *args)
+
+
+@app.post("/predict")
+async def predict(request: PredictRequest):
+    """Predict points or a viewport with a fitted model, without refitting"""
+    if request.model_id not in model_registry:
+        raise HTTPException(status_code=404, detail="Model not found; train it again")
+
+    try:
+        if request.points is not None:
+            body = await _run_with_model(
+                tasks.predict, request.model_id, request.points, request.probabilities
+            )
+        elif request.viewport is not None:
+            body = await _run_with_model(
+                tasks.predict_viewport,
+                request.model_id,
+                request.viewport.model_dump(),
+                request.boundary_format
+            )
+        else:
+            raise ValueError("Provide either points or a viewport")
+
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/models/{model_id}/tiles/{z}/{x}/{y}")
+async def get_boundary_tile(model_id: str, z: int = Path(..., ge=0, le=12), x: int = Path(..., ge=0),
+                            y: int = Path(..., ge=0), size: int = Query(64, ge=16, le=256),
+                            boundary_format: Literal["grid", "compact"] = "compact"):
+    """Decision boundary of a fitted model over one tile of feature space"""
+    key = f"{model_id}:{z}:{x}:{y}:{size}:{boundary_format}"
+    cached = tile_cache.get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
+    if model_id not in model_registry:
+        raise HTTPException(status_code=404, detail="Model not found; train it again")
+
+    try:
+        body = await _run_with_model(tasks.predict_tile, model_id, z, x, y, size, boundary_format)
+        tile_cache.put(key, body)
+        return Response(content=body, media_type="application/json")
+
+    except HTTPException:
+        raise
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/train-custom")
-async def train_custom_model(file: UploadFile = File(...), algorithm: str = "", parameters: str = "{}"):
+async def train_custom_model(file: UploadFile = File(...), algorithm: str = "", parameters: str = "{}",
+                             boundary_resolution: Optional[int] = Query(None, ge=10, le=1000),
+                             boundary_format: Literal["grid", "compact"] = "grid",
+                             include_learning_curves: bool = True, all_features: bool = False):
     """Train model on custom uploaded dataset"""
     try:
         import json
         
         # Read CSV
-        content = await file.read()
-        content_str = content.decode('utf-8')
-        X, y = dataset_loader.load_custom_dataset(content_str)
+        X, y = await run_in_threadpool(
+            dataset_loader.load_custom_file, file.file, upload_max_bytes, all_features=all_features
+        )
         
         # Parse parameters
         params = json.loads(parameters)
         
-        # Train model
-        result = model_trainer.train(
-            algorithm=algorithm,
-            X=X,
-            y=y,
-            parameters=params
+        # Train model in a worker process
+        model_id = uuid.uuid4().hex
+        body, packed_model, timings = await training_pool.run(
+            tasks.train_arrays,
+            algorithm,
+            X,
+            y,
+            params,
+            {
+                "boundary_resolution": boundary_resolution,
+                "boundary_format": boundary_format,
+                "include_learning_curves": include_learning_curves
+            },
+            model_id,
+            model_registry.max_model_bytes
         )
         
-        return result
+        _record_training(algorithm, "custom", timings, len(body))
+        if packed_model is not None:
+            model_registry.put(model_id, packed_model)
+        return Response(content=body, media_type="application/json")
     
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -0,0 +1,69 @@
+"""Report how long the API takes to import, as a share of cold-start time
+
+Runs ``python -X importtime -c "import app"`` in fresh interpreters and
+summarizes the slowest top-level packages by cumulative import time.
+
+Usage, from the backend directory:
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --module models.tasks --top 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_times(module: str):
+    """Return (total_us, [(self_us, cumulative_us, depth, name)]) for one fresh import"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": BACKEND_DIR}
+    )
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+
+    total = next((cumulative for _, cumulative, _, name in entries if name == module), 0)
+    return total, entries
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app", help="Module to import (default: app)")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to time")
+    parser.add_argument("--top", type=int, default=15, help="Packages to list")
+    args = parser.parse_args(argv)
+
+    totals = []
+    packages = defaultdict(list)
+    for _ in range(args.runs):
+        total, entries = import_times(args.module)
+        totals.append(total)
+        # Charge each top-level package for the modules it imported first
+        run = defaultdict(int)
+        for self_us, _, _, name in entries:
+            run[name.split(".")[0]] += self_us
+        for package, us in run.items():
+            packages[package].append(us)
+
+    print(f"import {args.module}: median {statistics.median(totals) / 1000:.0f} ms "
+          f"over {args.runs} runs (min {min(totals) / 1000:.0f} ms)")
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, times in ranked[:args.top]:
+        print(f"  {package:30s} {statistics.median(times) / 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
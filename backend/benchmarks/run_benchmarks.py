@@ -0,0 +1,221 @@
+"""Benchmark training across algorithms, datasets and sample sizes
+
+Runs every algorithm from /algorithms on every dataset of the same type
+from /datasets, both directly through MLModelTrainer.train_stages and
+through POST /train on the app in-process. For each case it reports the
+median wall time per stage, the peak memory allocated per stage and the
+serialized size of each stage's payload.
+
+Usage, from the backend directory:
+
+    python -m benchmarks.run_benchmarks --save benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --compare benchmarks/baseline.json
+
+With --compare the exit status is 1 when any case got slower than the
+baseline by more than --tolerance.
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+
+# Train in this process and never answer from the result cache, so every
+# request measures a full training run
+os.environ.setdefault("TRAIN_WORKERS", "0")
+os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+
+import numpy as np
+import sklearn
+from fastapi.testclient import TestClient
+
+import app as application
+from models.tasks import dataset_loader, model_trainer
+from utils.metrics import StageTimer
+from utils.payload import dumps
+
+
+DEFAULT_SIZES = (300, 3000, 30000)
+# Differences below this many seconds are treated as noise
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def list_cases(client, algorithms=None, datasets=None, sizes=DEFAULT_SIZES):
+    """Return (algorithm, parameters, dataset, n_samples) for every compatible pairing"""
+    cases = []
+    all_datasets = client.get("/datasets").json()["datasets"]
+    for algorithm in client.get("/algorithms").json()["algorithms"]:
+        if algorithms and algorithm["id"] not in algorithms:
+            continue
+        parameters = {p["name"]: p["default"] for p in algorithm["parameters"]}
+        for dataset in all_datasets:
+            if datasets and dataset["id"] not in datasets:
+                continue
+            if dataset["type"] != algorithm["type"]:
+                continue
+            # Bundled datasets have one size only
+            case_sizes = sizes[:1] if dataset["id"] in dataset_loader.FIXED_SIZE_DATASETS else sizes
+            for n_samples in case_sizes:
+                cases.append((algorithm["id"], parameters, dataset["id"], n_samples))
+    return cases
+
+
+def bench_trainer(algorithm, parameters, dataset, n_samples, options, repeat):
+    """Time MLModelTrainer.train_stages and measure its memory and payload sizes"""
+    X, y = dataset_loader.load_dataset(dataset, n_samples)
+
+    runs = []
+    for _ in range(repeat):
+        timer = StageTimer()
+        start = time.perf_counter()
+        sizes = {}
+        for stage, result in model_trainer.train_stages(
+            algorithm, X, y, parameters, timer=timer, **options
+        ):
+            with timer.stage("serialize"):
+                sizes[stage] = len(dumps(result))
+        timer.timings["total"] = time.perf_counter() - start
+        runs.append(timer.timings)
+
+    # One more run under tracemalloc, which is too slow to time
+    peaks = {}
+    tracemalloc.start()
+    try:
+        stages = model_trainer.train_stages(algorithm, X, y, parameters, **options)
+        while True:
+            tracemalloc.reset_peak()
+            try:
+                stage, _ = next(stages)
+            except StopIteration:
+                break
+            peaks[stage] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": _median_timings(runs),
+        "peak_bytes": peaks,
+        "response_bytes": sizes,
+    }
+
+
+def bench_api(client, algorithm, parameters, dataset, n_samples, options, repeat):
+    """Time POST /train in-process and record the worker's stage timings"""
+    request = {
+        "algorithm": algorithm,
+        "dataset": dataset,
+        "parameters": parameters,
+        "n_samples": n_samples,
+        "include_timings": True,
+        **options,
+    }
+
+    runs = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.post("/train", json=request)
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(response.text)
+        timings = response.json()["timings"]
+        timings["total"] = elapsed
+        runs.append(timings)
+        size = len(response.content)
+
+    return {"seconds": _median_timings(runs), "response_bytes": {"total": size}}
+
+
+def _median_timings(runs):
+    stages = {stage for run in runs for stage in run}
+    return {stage: statistics.median(run.get(stage, 0.0) for run in runs) for stage in sorted(stages)}
+
+
+def compare(results, baseline, tolerance):
+    """Return a line for every case whose total time regressed past the tolerance"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        now, before = result["seconds"]["total"], previous["seconds"]["total"]
+        if now > before * (1 + tolerance) and now - before > MIN_REGRESSION_SECONDS:
+            regressions.append(f"{name}: {before * 1000:.1f} ms -> {now * 1000:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--algorithms", nargs="*", help="Algorithm ids (default: all)")
+    parser.add_argument("--datasets", nargs="*", help="Dataset ids (default: all)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=list(DEFAULT_SIZES),
+                        help="Sample counts for synthetic datasets")
+    parser.add_argument("--mode", choices=("trainer", "api", "both"), default="both")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case")
+    parser.add_argument("--boundary-format", choices=("grid", "compact"), default="compact")
+    parser.add_argument("--learning-curves", action="store_true",
+                        help="Include learning curves (about 30 extra fits per case)")
+    parser.add_argument("--save", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown over the baseline, as a fraction")
+    args = parser.parse_args(argv)
+
+    options = {
+        "boundary_format": args.boundary_format,
+        "include_learning_curves": args.learning_curves,
+    }
+    results = {}
+
+    with TestClient(application.app) as client:
+        cases = list_cases(client, args.algorithms, args.datasets, args.sizes)
+        modes = ("trainer", "api") if args.mode == "both" else (args.mode,)
+        for algorithm, parameters, dataset, n_samples in cases:
+            for mode in modes:
+                size = "fixed" if dataset in dataset_loader.FIXED_SIZE_DATASETS else n_samples
+                name = f"{mode}/{algorithm}/{dataset}/{size}"
+                if mode == "trainer":
+                    result = bench_trainer(algorithm, parameters, dataset, n_samples, options, args.repeat)
+                else:
+                    result = bench_api(client, algorithm, parameters, dataset, n_samples, options, args.repeat)
+                results[name] = result
+                print(f"{name:55s} {result['seconds']['total'] * 1000:9.1f} ms "
+                      f"{sum(result['response_bytes'].values()) / 1024:9.1f} KiB", flush=True)
+
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        max_rss *= 1024
+    print(f"peak RSS {max_rss / 1024 ** 2:.0f} MiB")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "environment": {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "scikit-learn": sklearn.__version__,
+                    "machine": platform.machine(),
+                    "max_rss_bytes": max_rss,
+                },
+                "options": options,
+                "results": results,
+            }, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,91 @@
 import numpy as np
-from sklearn.linear_model import LogisticRegression, LinearRegression
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.tree import DecisionTreeClassifier, export_text
-from sklearn.ensemble import (
-    RandomForestClassifier, 
-    GradientBoostingClassifier,
-    AdaBoostClassifier,
-    ExtraTreesClassifier,
-    BaggingClassifier
-)
-from sklearn.svm import SVC
-from sklearn.model_selection import train_test_split, learning_curve
-from sklearn.metrics import accuracy_score, mean_squared_error, confusion_matrix
+from collections.abc import Mapping
+import hashlib
+import importlib
 import json
+import warnings
+
+from utils.metrics import StageTimer
+from utils.payload import encode_axis, encode_labels, encode_typed
+from utils.projection import PCAProjection, ProjectedModel
+
+
+class EstimatorRegistry(Mapping):
+    """Estimator classes by algorithm id, imported on first use
+
+    scikit-learn is slow to import, so only the estimators actually
+    requested are loaded, and not before the first request.
+    """
+
+    def __init__(self, paths: dict):
+        self._paths = dict(paths)
+        self._classes = {}
+
+    def __getitem__(self, algorithm: str):
+        estimator = self._classes.get(algorithm)
+        if estimator is None:
+            module, _, name = self._paths[algorithm].rpartition(".")
+            estimator = self._classes[algorithm] = getattr(importlib.import_module(module), name)
+        return estimator
+
+    def __contains__(self, algorithm) -> bool:
+        return algorithm in self._paths
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    def modules(self) -> list:
+        """Modules defining the registered estimators, for preloading"""
+        return sorted({path.rpartition(".")[0] for path in self._paths.values()})
 
 
 class MLModelTrainer:
     """Train models and generate visualization data"""
+
+    # Decision boundary mesh: preferred step, max points per axis, and the
+    # coarse block size (a power of two) used for adaptive refinement
+    boundary_step = 0.02
+    boundary_resolution = 300
+    boundary_block = 4
+    # Mesh points per predict_proba/decision_function call when computing
+    # confidence, bounding the memory of the score matrices
+    boundary_chunk = 65536
+
+    # Default number of data points sent for plotting; larger datasets are
+    # sampled per class (or per region for regression). None sends all.
+    point_budget = None
     
-    def __init__(self):
-        self.models = {
-            "logistic_regression": LogisticRegression,
-            "knn": KNeighborsClassifier,
-            "decision_tree": DecisionTreeClassifier,
-            "random_forest": RandomForestClassifier,
-            "gradient_boosting": GradientBoostingClassifier,
-            "adaboost": AdaBoostClassifier,
-            "extra_trees": ExtraTreesClassifier,
-            "bagging": BaggingClassifier,
-            "svm": SVC,
-            "linear_regression": LinearRegression
-        }
+    # Ensembles whose individual trees can be exported
+    forest_algorithms = ("random_forest", "extra_trees")
+    
+    def __init__(self, n_jobs: int = 1, batch_jobs: int = 1, float_decimals: int = None,
+                 point_budget: int = None):
+        # Cores used by one learning-curve run. Requests already run in
+        # parallel worker processes, so a low cap avoids oversubscription.
+        self.n_jobs = n_jobs
+        # Cores used to fit the configurations of one batch part inside a worker;
+        # the endpoint already spreads a batch's parts across workers
+        self.batch_jobs = batch_jobs
+        # Decimals kept for coordinates and regression values in responses;
+        # None sends full precision
+        self.float_decimals = float_decimals
+        if point_budget is not None:
+            self.point_budget = point_budget
+        self.models = EstimatorRegistry({
+            "logistic_regression": "sklearn.linear_model.LogisticRegression",
+            "knn": "sklearn.neighbors.KNeighborsClassifier",
+            "decision_tree": "sklearn.tree.DecisionTreeClassifier",
+            "random_forest": "sklearn.ensemble.RandomForestClassifier",
+            "gradient_boosting": "sklearn.ensemble.GradientBoostingClassifier",
+            "adaboost": "sklearn.ensemble.AdaBoostClassifier",
+            "extra_trees": "sklearn.ensemble.ExtraTreesClassifier",
+            "bagging": "sklearn.ensemble.BaggingClassifier",
+            "svm": "sklearn.svm.SVC",
+            "linear_regression": "sklearn.linear_model.LinearRegression"
+        })
     
     def _process_parameters(self, parameters: dict) -> dict:
         """Convert string parameters to proper Python types"""
@@ -48,189 +103,715 @@ class MLModelTrainer:
                 processed[key] = value
         return processed
     
-    def train(self, algorithm: str, X: np.ndarray, y: np.ndarray, parameters: dict):
+    def request_key(self, algorithm: str, dataset: str, parameters: dict, **options) -> str:
+        """Canonical hash of a training request after parameter normalisation"""
+        canonical = json.dumps({
+            "algorithm": algorithm,
+            "dataset": dataset,
+            "parameters": self._process_parameters(parameters),
+            "options": options
+        }, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def train(self, algorithm: str, X: np.ndarray, y: np.ndarray, parameters: dict, **options):
         """Train model and return results"""
+        result = {}
+        for _, stage_result in self.train_stages(algorithm, X, y, parameters, **options):
+            result.update(stage_result)
+        return result
+    
+    def train_stages(self, algorithm: str, X: np.ndarray, y: np.ndarray, parameters: dict,
+                     boundary_resolution: int = None, boundary_format: str = "grid",
+                     include_learning_curves: bool = True, tree_estimator: int = None,
+                     tree_max_depth: int = None, tree_format: str = "records",
+                     boundary_confidence: bool = False, point_budget: int = None,
+                     projection: PCAProjection = None, model_id: str = None, on_fit=None,
+                     timer: StageTimer = None):
+        """Train model and yield (stage, results) pairs as each stage completes
+
+        Stages are metrics, decision_boundary, learning_curves and
+        tree_structure, cheapest first so clients can render early.
+        Learning curves are None when not included; they can be fetched
+        separately with learning_curves(). For random_forest and
+        extra_trees, tree_estimator selects one fitted tree to export.
+        boundary_confidence adds confidence and margin surfaces to the
+        decision boundary of classifiers.
+
+        Datasets larger than point_budget (default: the trainer's) are
+        sampled for plotting: decision_boundary.data_points then holds the
+        sample, and training_data/test_data list positions into it instead
+        of repeating coordinates. Metrics always use the full data.
+
+        Models are fitted on every column of X. With more than two, points
+        and boundary are plotted on a 2-D PCA projection (fitted here unless
+        one is given) and the boundary is evaluated at the feature vectors
+        that the mesh maps back to.
+
+        on_fit(model, info) is called with the fitted model so the caller
+        can keep it, and returns whether it did; only then is model_id
+        echoed in the metrics stage. timer, if given, records the time
+        spent in each step.
+        """
+        from sklearn.metrics import confusion_matrix
+        from sklearn.model_selection import train_test_split
+        
         if algorithm not in self.models:
             raise ValueError(f"Unknown algorithm: {algorithm}")
+        if tree_estimator is not None and algorithm not in self.forest_algorithms:
+            raise ValueError(f"tree_estimator is not supported for {algorithm}")
+        
+        timer = timer or StageTimer()
         
         # Convert string parameters to proper types
         processed_params = self._process_parameters(parameters)
         
         # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        with timer.stage("split"):
+            X_train, X_test, y_train, y_test, rows_train, rows_test = train_test_split(
+                X, y, np.arange(len(X)), test_size=0.2, random_state=42
+            )
+        
+        # Coordinates every row is plotted at
+        with timer.stage("project"):
+            projection = self._projection(X, projection)
+            view = X if projection is None else projection.transform(X)
         
         # Create and train model
         model_class = self.models[algorithm]
         model = model_class(**processed_params)
-        model.fit(X_train, y_train)
+        with timer.stage("fit"):
+            model.fit(X_train, y_train)
+        # Reject a missing tree before any stage has been sent
+        if tree_estimator is not None and not 0 <= tree_estimator < len(model.estimators_):
+            raise ValueError(f"tree_estimator must be below {len(model.estimators_)}")
         
         # Predictions
-        y_pred = model.predict(X_test)
+        with timer.stage("predict"):
+            y_pred = model.predict(X_test)
         
         # Calculate metrics
         is_classification = algorithm != "linear_regression"
-        if is_classification:
-            score = accuracy_score(y_test, y_pred)
-            metric_name = "accuracy"
-        else:
-            score = mean_squared_error(y_test, y_pred)
-            metric_name = "mse"
+        metric_name, score = self._score(is_classification, y_test, y_pred)
         
-        # Generate decision boundary data
-        decision_boundary = self._generate_decision_boundary(model, X, y)
+        kept = on_fit is not None and on_fit(
+            model, self._model_info(algorithm, view, is_classification, projection)
+        )
         
         # Feature importance (for tree-based models)
         feature_importance = None
         if hasattr(model, 'feature_importances_'):
-            feature_importance = model.feature_importances_.tolist()
-        
-        # Decision tree structure (for tree models)
-        tree_structure = None
-        if algorithm == "decision_tree":
-            tree_structure = self._export_tree_structure(model, X_train)
+            feature_importance = model.feature_importances_
         
         # Confusion matrix (for classification)
         conf_matrix = None
         if is_classification:
-            conf_matrix = confusion_matrix(y_test, y_pred).tolist()
+            conf_matrix = confusion_matrix(y_test, y_pred)
         
-        # Learning curves
-        learning_curves_data = self._generate_learning_curves(model_class, processed_params, X, y)
+        # Rows plotted for large datasets; the split refers to them by position
+        point_rows = self._plot_sample(view, y, is_classification, point_budget or self.point_budget)
+        if point_rows is None:
+            plot_train, plot_test = X_train, X_test
+            if projection is not None:
+                plot_train, plot_test = view[rows_train], view[rows_test]
+            training_data = {"X": self._round(plot_train), "y": self._round(y_train)}
+            test_data = {
+                "X": self._round(plot_test),
+                "y": self._round(y_test),
+                "predictions": self._round(y_pred)
+            }
+        else:
+            position = np.full(len(X), -1)
+            position[point_rows] = np.arange(len(point_rows))
+            train_positions, test_positions = position[rows_train], position[rows_test]
+            plotted = test_positions >= 0
+            training_data = {
+                "points": train_positions[train_positions >= 0],
+                "total": len(X_train)
+            }
+            test_data = {
+                "points": test_positions[plotted],
+                "predictions": self._round(y_pred[plotted]),
+                "total": len(X_test)
+            }
         
-        return {
+        yield "metrics", {
             "success": True,
+            "model_id": model_id if kept else None,
             "metrics": {
                 metric_name: float(score),
                 "train_size": len(X_train),
                 "test_size": len(X_test)
             },
-            "decision_boundary": decision_boundary,
             "feature_importance": feature_importance,
-            "tree_structure": tree_structure,
             "confusion_matrix": conf_matrix,
-            "learning_curves": learning_curves_data,
-            "training_data": {
-                "X": X_train.tolist(),
-                "y": y_train.tolist()
-            },
-            "test_data": {
-                "X": X_test.tolist(),
-                "y": y_test.tolist(),
-                "predictions": y_pred.tolist()
-            }
+            "training_data": training_data,
+            "test_data": test_data
+        }
+        
+        # Generate decision boundary data
+        with timer.stage("boundary"):
+            decision_boundary = self._generate_decision_boundary(
+                self._plot_model(model, projection), view, y,
+                resolution=boundary_resolution,
+                adaptive=is_classification,
+                boundary_format=boundary_format,
+                confidence=boundary_confidence,
+                point_rows=point_rows
+            )
+        yield "decision_boundary", {"decision_boundary": decision_boundary}
+        
+        # Learning curves
+        learning_curves_data = None
+        if include_learning_curves:
+            with timer.stage("learning_curves"):
+                learning_curves_data = self._generate_learning_curves(
+                    model_class, processed_params, X, y, is_classification
+                )
+        
+        yield "learning_curves", {"learning_curves": learning_curves_data}
+        
+        # Decision tree structure (for tree models)
+        tree_model = None
+        if algorithm == "decision_tree":
+            tree_model = model
+        elif tree_estimator is not None:
+            tree_model = model.estimators_[tree_estimator]
+        
+        tree_structure = None
+        if tree_model is not None:
+            with timer.stage("tree_export"):
+                tree_structure = self._export_tree_structure(
+                    tree_model, X_train, max_depth=tree_max_depth, tree_format=tree_format
+                )
+        
+        yield "tree_structure", {"tree_structure": tree_structure}
+    
+    def train_batch(self, algorithm: str, X: np.ndarray, y: np.ndarray, parameter_sets: list,
+                    include_boundaries: bool = False, boundary_resolution: int = None,
+                    boundary_format: str = "grid", point_budget: int = None,
+                    projection: PCAProjection = None, include_points: bool = True):
+        """Train one model per parameter set on a shared split and mesh
+
+        Fits run in parallel across ``batch_jobs`` cores. A parameter set
+        that fails to fit reports its error without failing the batch.
+        Multi-feature data is plotted on a projection as in train_stages.
+        include_points=False leaves out the shared data points, for parts
+        of a batch whose points another part already sends.
+        """
+        from joblib import Parallel, delayed
+        from sklearn.model_selection import train_test_split
+        
+        if algorithm not in self.models:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        
+        # Split data and build the mesh once for every configuration
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y, test_size=0.2, random_state=42
+        )
+        is_classification = algorithm != "linear_regression"
+        axes = None
+        if include_boundaries:
+            projection = self._projection(X, projection)
+            view = X if projection is None else projection.transform(X)
+            axes = self._boundary_axes(view, boundary_resolution or self.boundary_resolution)
+        
+        results = Parallel(n_jobs=self.batch_jobs)(
+            delayed(self._train_config)(
+                algorithm, parameters, X, y, X_train, X_test, y_train, y_test,
+                is_classification, axes, boundary_format, projection
+            )
+            for parameters in parameter_sets
+        )
+        
+        batch = {
+            "success": True,
+            "algorithm": algorithm,
+            "train_size": len(X_train),
+            "test_size": len(X_test),
+            "results": results
         }
+        if include_boundaries and include_points:
+            # Points are shared; each result only carries its class grid
+            point_rows = self._plot_sample(view, y, is_classification, point_budget or self.point_budget)
+            batch["data_points"] = self._data_points(view, y, is_classification, boundary_format, point_rows)
+        return batch
     
-    def _generate_learning_curves(self, model_class, parameters, X, y):
+    def _train_config(self, algorithm, parameters, X, y, X_train, X_test, y_train, y_test,
+                      is_classification, axes, boundary_format, projection=None):
+        """Fit and score one batch configuration"""
+        from sklearn.metrics import confusion_matrix
+        
+        result = {"parameters": parameters, "error": None}
+        try:
+            model = self.models[algorithm](**self._process_parameters(parameters))
+            model.fit(X_train, y_train)
+            y_pred = model.predict(X_test)
+        except Exception as e:
+            result["error"] = str(e)
+            return result
+        
+        metric_name, score = self._score(is_classification, y_test, y_pred)
+        result["metrics"] = {metric_name: float(score)}
+        if is_classification:
+            result["confusion_matrix"] = confusion_matrix(y_test, y_pred)
+        if axes is not None:
+            result["decision_boundary"] = self._generate_decision_boundary(
+                self._plot_model(model, projection), X, y, adaptive=is_classification,
+                boundary_format=boundary_format, axes=axes, include_points=False
+            )
+        return result
+    
+    def predict_points(self, model, points, probabilities: bool = False, info: dict = None):
+        """Predict a batch of 2-D points (in plot coordinates) with a fitted model"""
+        model = self._plot_model(model, (info or {}).get("projection"))
+        points = np.asarray(points, dtype=float)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("points must be a list of [x, y] pairs")
+        
+        result = {"predictions": self._round(model.predict(points)), "probabilities": None}
+        if probabilities and hasattr(model, "predict_proba"):
+            result["probabilities"] = model.predict_proba(points)
+            result["classes"] = model.classes_
+        return result
+    
+    def predict_viewport(self, model, info: dict, x_range, y_range, resolution: int = None,
+                         boundary_format: str = "grid", confidence: bool = False):
+        """Evaluate the decision boundary of a fitted model over a viewport"""
+        count = self._lattice_count(resolution or self.boundary_resolution)
+        axes = (np.linspace(*x_range, count), np.linspace(*y_range, count))
+        return self._generate_decision_boundary(
+            self._plot_model(model, info.get("projection")), None, None,
+            adaptive=info["classification"],
+            boundary_format=boundary_format,
+            axes=axes,
+            include_points=False,
+            confidence=confidence
+        )
+    
+    def predict_tile(self, model, info: dict, z: int, x: int, y: int, size: int = 64,
+                     boundary_format: str = "grid"):
+        """Evaluate one tile of a fitted model's boundary
+
+        The model's mesh extent is split into 2**z by 2**z tiles; x counts
+        from the left and y from the bottom of feature space.
+        """
+        tiles = 2 ** z
+        if not (0 <= x < tiles and 0 <= y < tiles):
+            raise ValueError(f"Tile {x}/{y} is outside zoom level {z}")
+        
+        (x_min, x_max), (y_min, y_max) = info["bounds"]
+        width, height = (x_max - x_min) / tiles, (y_max - y_min) / tiles
+        boundary = self.predict_viewport(
+            model, info,
+            x_range=(x_min + x * width, x_min + (x + 1) * width),
+            y_range=(y_min + y * height, y_min + (y + 1) * height),
+            resolution=size,
+            boundary_format=boundary_format
+        )
+        boundary["tile"] = {"z": z, "x": x, "y": y}
+        return boundary
+    
+    def _model_info(self, algorithm, X, is_classification, projection=None):
+        """Metadata kept alongside a fitted model; X is in plot coordinates"""
+        return {
+            "algorithm": algorithm,
+            "classification": is_classification,
+            # Extent of the default boundary mesh
+            "bounds": [
+                [float(X[:, 0].min() - 1), float(X[:, 0].max() + 1)],
+                [float(X[:, 1].min() - 1), float(X[:, 1].max() + 1)]
+            ],
+            "projection": projection
+        }
+    
+    def _projection(self, X, projection=None):
+        """Projection to plot X with, or None when X is already 2-D"""
+        if X.shape[1] <= 2:
+            return None
+        return projection or PCAProjection.fit(X)
+    
+    def _plot_model(self, model, projection):
+        """Wrap a model so it predicts plot coordinates through the projection"""
+        return model if projection is None else ProjectedModel(model, projection)
+    
+    def _score(self, is_classification, y_test, y_pred):
+        """Return the metric name and test score"""
+        from sklearn.metrics import accuracy_score, mean_squared_error
+        
+        if is_classification:
+            return "accuracy", accuracy_score(y_test, y_pred)
+        return "mse", mean_squared_error(y_test, y_pred)
+    
+    def learning_curves(self, algorithm: str, X: np.ndarray, y: np.ndarray, parameters: dict):
+        """Generate learning curves on their own, without the other stages"""
+        if algorithm not in self.models:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        
+        return self._generate_learning_curves(
+            self.models[algorithm], self._process_parameters(parameters), X, y,
+            is_classification=algorithm != "linear_regression"
+        )
+    
+    def _generate_learning_curves(self, model_class, parameters, X, y, is_classification=True):
         """Generate learning curves data"""
+        from sklearn.model_selection import learning_curve
+        
         try:
+            estimator = model_class(**parameters)
             train_sizes = np.linspace(0.1, 1.0, 10)
             train_sizes_abs, train_scores, test_scores = learning_curve(
-                model_class(**parameters), X, y, 
-                train_sizes=train_sizes, cv=3, n_jobs=-1,
-                scoring='accuracy' if model_class != LinearRegression else 'r2'
+                estimator, X, y, 
+                train_sizes=train_sizes, cv=3, n_jobs=self.n_jobs,
+                scoring='accuracy' if is_classification else 'r2'
             )
             
+            # Folds that fail to fit (e.g. a single-class slice) score NaN;
+            # average the others and send null where every fold failed
+            def summarize(reduce, scores):
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    values = reduce(scores, axis=1)
+                return [None if np.isnan(v) else float(v) for v in values]
+            
             return {
-                "train_sizes": train_sizes_abs.tolist(),
-                "train_scores_mean": train_scores.mean(axis=1).tolist(),
-                "train_scores_std": train_scores.std(axis=1).tolist(),
-                "test_scores_mean": test_scores.mean(axis=1).tolist(),
-                "test_scores_std": test_scores.std(axis=1).tolist()
+                "train_sizes": train_sizes_abs,
+                "train_scores_mean": summarize(np.nanmean, train_scores),
+                "train_scores_std": summarize(np.nanstd, train_scores),
+                "test_scores_mean": summarize(np.nanmean, test_scores),
+                "test_scores_std": summarize(np.nanstd, test_scores)
             }
         except Exception as e:
             return None
     
-    def _export_tree_structure(self, model, X):
-        """Export decision tree structure for visualization"""
+    def _export_tree_structure(self, model, X, max_depth=None, tree_format="records"):
+        """Export decision tree structure for visualization
+
+        Works on the fitted tree arrays directly, so deep trees need neither
+        recursion nor per-node list copies. Nodes below ``max_depth`` are
+        dropped and their cut-off parents marked as truncated.
+        """
         from sklearn.tree import _tree
         
         tree = model.tree_
-        feature_names = [f"Feature {i+1}" for i in range(X.shape[1])]
+        feature = tree.feature
+        children_left, children_right = tree.children_left, tree.children_right
+        is_leaf = feature == _tree.TREE_UNDEFINED
         
-        def recurse(node, depth, parent_id=None, position='root'):
-            """Recursively build tree structure"""
-            if node == _tree.TREE_LEAF:
-                return []
-            
-            nodes = []
-            node_id = f"node_{node}_{depth}"
-            
-            # Get node information
-            feature = tree.feature[node]
-            threshold = tree.threshold[node]
-            samples = tree.n_node_samples[node]
-            value = tree.value[node][0]
-            
-            # Determine node label
-            if feature != _tree.TREE_UNDEFINED:
-                label = f"{feature_names[feature]}\n≤ {threshold:.2f}\nsamples: {samples}"
-            else:
-                label = f"Class: {int(value.argmax())}\nsamples: {samples}"
-            
-            node_info = {
+        # Parent and side (0 root, 1 left, 2 right) of every node
+        internal = np.flatnonzero(~is_leaf)
+        parent = np.full(tree.node_count, -1)
+        parent[children_left[internal]] = internal
+        parent[children_right[internal]] = internal
+        side = np.zeros(tree.node_count, dtype=np.int8)
+        side[children_left[internal]] = 1
+        side[children_right[internal]] = 2
+        
+        # Depth of every node, one tree level at a time
+        depth = np.zeros(tree.node_count, dtype=np.intp)
+        level, d = np.array([0]), 0
+        while level.size:
+            depth[level] = d
+            level = level[~is_leaf[level]]
+            level = np.concatenate([children_left[level], children_right[level]])
+            d += 1
+        
+        nodes = np.arange(tree.node_count)
+        if max_depth is not None:
+            nodes = nodes[depth[nodes] <= max_depth]
+        node_depth = depth[nodes]
+        node_leaf = is_leaf[nodes]
+        truncated = ~node_leaf & (node_depth == max_depth)
+        samples = tree.n_node_samples[nodes]
+        
+        # Build ids and labels for all nodes at once
+        ids = np.char.add(np.char.add("node_", nodes.astype(str)), np.char.add("_", node_depth.astype(str)))
+        sample_text = np.char.add("\nsamples: ", samples.astype(str))
+        split_text = np.char.add(
+            np.char.add("Feature ", (feature[nodes] + 1).astype(str)),
+            np.char.add("\n≤ ", np.char.mod("%.2f", tree.threshold[nodes]))
+        )
+        class_text = np.char.add("Class: ", tree.value[nodes, 0].argmax(axis=1).astype(str))
+        labels = np.char.add(np.where(node_leaf, class_text, split_text), sample_text)
+        
+        # Refer to parents by their row in the exported arrays
+        row = np.full(tree.node_count, -1)
+        row[nodes] = np.arange(len(nodes))
+        parent_row = np.where(parent[nodes] >= 0, row[parent[nodes]], -1)
+        positions = np.array(["root", "left", "right"])[side[nodes]]
+        max_node_depth = int(node_depth.max()) if len(nodes) else 0
+        
+        if tree_format == "columnar":
+            return {
+                "format": "columnar",
+                "ids": ids.tolist(),
+                "labels": labels.tolist(),
+                "parents": parent_row,
+                "positions": positions.tolist(),
+                "depths": node_depth,
+                "is_leaf": node_leaf,
+                "truncated": truncated,
+                "samples": samples,
+                "max_depth": max_node_depth
+            }
+        
+        id_list = ids.tolist()
+        parent_ids = [id_list[p] if p >= 0 else None for p in parent_row.tolist()]
+        tree_nodes = [
+            {
                 'id': node_id,
                 'label': label,
                 'parent': parent_id,
                 'position': position,
-                'depth': depth,
-                'is_leaf': feature == _tree.TREE_UNDEFINED,
-                'samples': int(samples)
+                'depth': node_d,
+                'is_leaf': leaf,
+                'truncated': cut,
+                'samples': n
             }
-            nodes.append(node_info)
-            
-            # Recurse for children
-            if feature != _tree.TREE_UNDEFINED:
-                left_child = tree.children_left[node]
-                right_child = tree.children_right[node]
-                
-                if left_child != _tree.TREE_LEAF:
-                    nodes.extend(recurse(left_child, depth + 1, node_id, 'left'))
-                if right_child != _tree.TREE_LEAF:
-                    nodes.extend(recurse(right_child, depth + 1, node_id, 'right'))
-            
-            return nodes
-        
-        tree_nodes = recurse(0, 0)
+            for node_id, label, parent_id, position, node_d, leaf, cut, n in zip(
+                id_list, labels.tolist(), parent_ids, positions.tolist(), node_depth.tolist(),
+                node_leaf.tolist(), truncated.tolist(), samples.tolist()
+            )
+        ]
         
         # Build edges for visualization
-        edges = []
-        for node in tree_nodes:
-            if node['parent']:
-                edges.append({
-                    'from': node['parent'],
-                    'to': node['id'],
-                    'label': node['position']
-                })
+        edges = [
+            {'from': parent_id, 'to': node_id, 'label': position}
+            for node_id, parent_id, position in zip(id_list, parent_ids, positions.tolist())
+            if parent_id is not None
+        ]
         
         return {
             'nodes': tree_nodes,
             'edges': edges,
-            'max_depth': max(n['depth'] for n in tree_nodes) if tree_nodes else 0
+            'max_depth': max_node_depth
         }
     
-    def _generate_decision_boundary(self, model, X, y):
+    def _lattice_count(self, count):
+        """Largest axis length up to count whose coarse lattice lands on both edges"""
+        block = self.boundary_block
+        return max((int(count) - 1) // block, 1) * block + 1
+
+    def _boundary_axes(self, X, resolution):
+        """Build mesh axes bounded by a per-axis point budget"""
+        axes = []
+        for column in (X[:, 0], X[:, 1]):
+            lo, hi = column.min() - 1, column.max() + 1
+            # Keep the original 0.02 step for narrow ranges, but never exceed
+            # the budget on wide ones (e.g. raw breast_cancer features)
+            count = int(min(np.ceil((hi - lo) / self.boundary_step), resolution))
+            # Round down so the coarse lattice used for refinement lands on
+            # the edges without exceeding the budget
+            count = self._lattice_count(count)
+            axes.append(np.linspace(lo, hi, count))
+        return axes[0], axes[1]
+
+    def _predict_adaptive(self, predict, xs, ys):
+        """Evaluate a mesh by quadtree refinement around class transitions
+
+        Cells of the coarse lattice whose four corners agree are filled
+        without evaluating their interior; the rest are halved down to single
+        points. The result is approximate: a region that fits inside a cell
+        without reaching any of its corners (e.g. a thin tree split) is
+        missed. Boundaries that are straight across a cell are exact.
+        """
+        ny, nx = len(ys), len(xs)
+        Z = None
+        known = np.zeros((ny, nx), dtype=bool)
+        step = self.boundary_block
+
+        while True:
+            # Evaluate the lattice points of this level that are still unknown
+            todo = np.zeros((ny, nx), dtype=bool)
+            todo[::step, ::step] = True
+            todo &= ~known
+            rows, cols = np.nonzero(todo)
+            if len(rows):
+                pred = predict(np.c_[xs[cols], ys[rows]])
+                if Z is None:
+                    Z = np.empty((ny, nx), dtype=pred.dtype)
+                Z[rows, cols] = pred
+                known[rows, cols] = True
+
+            if step == 1:
+                break
+
+            # Fill every cell whose corners all predict the same class
+            corners = Z[::step, ::step]
+            uniform = (
+                (corners[:-1, :-1] == corners[1:, :-1])
+                & (corners[:-1, :-1] == corners[:-1, 1:])
+                & (corners[:-1, :-1] == corners[1:, 1:])
+            )
+            cell_rows = np.minimum(np.arange(ny) // step, uniform.shape[0] - 1)
+            cell_cols = np.minimum(np.arange(nx) // step, uniform.shape[1] - 1)
+            fill = uniform[np.ix_(cell_rows, cell_cols)] & ~known
+            Z[fill] = corners[:-1, :-1][np.ix_(cell_rows, cell_cols)][fill]
+            known |= fill
+
+            step //= 2
+
+        return Z
+
+    def _predict_confidence(self, model, xs, ys):
+        """Evaluate mesh labels, confidence and margin from one scoring pass
+
+        Labels are the argmax of predict_proba, or of decision_function for
+        models without probabilities; scores are then turned into
+        probabilities by a sigmoid or softmax. Confidence is the top class
+        probability and margin its lead over the runner-up. The mesh is
+        scored in chunks of boundary_chunk points.
+        """
+        ny, nx = len(ys), len(xs)
+        classes = model.classes_
+        source = "predict_proba" if hasattr(model, "predict_proba") else "decision_function"
+        score = getattr(model, source)
+
+        labels = np.empty(ny * nx, dtype=classes.dtype)
+        confidence = np.empty(ny * nx, dtype=np.float32)
+        margin = np.empty(ny * nx, dtype=np.float32)
+        for start in range(0, ny * nx, self.boundary_chunk):
+            index = np.arange(start, min(start + self.boundary_chunk, ny * nx))
+            scores = score(np.c_[xs[index % nx], ys[index // nx]])
+
+            if source == "decision_function":
+                if scores.ndim == 1:
+                    positive = 1 / (1 + np.exp(-scores))
+                    scores = np.c_[1 - positive, positive]
+                else:
+                    scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+                    scores /= scores.sum(axis=1, keepdims=True)
+
+            top = np.argmax(scores, axis=1)
+            ordered = np.sort(scores, axis=1)
+            labels[index] = classes[top]
+            confidence[index] = ordered[:, -1]
+            margin[index] = ordered[:, -1] - ordered[:, -2] if scores.shape[1] > 1 else 1.0
+
+        shape = (ny, nx)
+        return labels.reshape(shape), confidence.reshape(shape), margin.reshape(shape), source
+
+    def _generate_decision_boundary(self, model, X, y, resolution=None, adaptive=True,
+                                    boundary_format="grid", axes=None, include_points=True,
+                                    confidence=False, point_rows=None):
         """Generate decision boundary mesh for visualization"""
-        h = 0.02  # step size in mesh
-        x_min, x_max = X[:, 0].min() - 1, X[:, 0].max() + 1
-        y_min, y_max = X[:, 1].min() - 1, X[:, 1].max() + 1
-        
-        xx, yy = np.meshgrid(
-            np.arange(x_min, x_max, h),
-            np.arange(y_min, y_max, h)
-        )
-        
-        # Predict on mesh
-        Z = model.predict(np.c_[xx.ravel(), yy.ravel()])
-        Z = Z.reshape(xx.shape)
+        xs, ys = axes or self._boundary_axes(X, resolution or self.boundary_resolution)
+
+        # Predict on mesh; confidence needs scores at every point, so it
+        # replaces the adaptive refinement rather than adding a second pass
+        surfaces = None
+        if confidence and adaptive and (
+            hasattr(model, "predict_proba") or hasattr(model, "decision_function")
+        ):
+            Z, max_proba, margin, source = self._predict_confidence(model, xs, ys)
+            surfaces = {"confidence": max_proba, "margin": margin}
+        elif adaptive:
+            Z = self._predict_adaptive(model.predict, xs, ys)
+        else:
+            xx, yy = np.meshgrid(xs, ys)
+            Z = model.predict(np.c_[xx.ravel(), yy.ravel()])
+            Z = Z.reshape(xx.shape)
+
+        if boundary_format == "compact":
+            # Axes are evenly spaced, so start/step/count replaces the meshgrids
+            boundary = {
+                "format": "compact",
+                "x_axis": encode_axis(xs),
+                "y_axis": encode_axis(ys),
+                "z": encode_labels(Z, classification=adaptive)
+            }
+            if isinstance(model, ProjectedModel):
+                boundary["projection"] = model.projection.describe()
+            if surfaces is not None:
+                # Quantize [0, 1] surfaces to uint8; value = byte * scale
+                for name, values in surfaces.items():
+                    boundary[name] = encode_typed(np.rint(values * 255), np.uint8)
+                    boundary[name]["scale"] = 1 / 255
+                boundary["confidence_source"] = source
+            if include_points:
+                boundary["data_points"] = self._data_points(X, y, adaptive, boundary_format, point_rows)
+            return boundary
+
+        xx, yy = np.meshgrid(xs, ys)
+        boundary = {
+            "x": self._round(xx),
+            "y": self._round(yy),
+            "z": self._round(Z)
+        }
+        if isinstance(model, ProjectedModel):
+            boundary["projection"] = model.projection.describe()
+        if surfaces is not None:
+            for name, values in surfaces.items():
+                boundary[name] = np.round(values, 3)
+            boundary["confidence_source"] = source
+        if include_points:
+            boundary["data_points"] = self._data_points(X, y, adaptive, boundary_format, point_rows)
+        return boundary
+
+    def _data_points(self, X, y, is_classification, boundary_format="grid", rows=None):
+        """Encode the plotted data points in the boundary format
+
+        When rows is given only those rows are sent, along with their row
+        numbers and the full dataset size.
+        """
+        sample = {}
+        if rows is not None:
+            sample = {"rows": rows, "total": len(X)}
+            X, y = X[rows], y[rows]
         
-        return {
-            "x": xx.tolist(),
-            "y": yy.tolist(),
-            "z": Z.tolist(),
-            "data_points": {
-                "X": X.tolist(),
-                "y": y.tolist()
+        if boundary_format == "compact":
+            return {
+                "X": encode_typed(X, np.float32),
+                "y": encode_labels(y, classification=is_classification),
+                **sample
             }
+        return {
+            "X": self._round(X),
+            "y": self._round(y),
+            **sample
         }
+    
+    def _plot_sample(self, X, y, is_classification, budget, cells=32):
+        """Row indices of at most budget points to plot, or None to plot all
+
+        Classifiers are sampled per class and regressors per cell of a
+        cells x cells grid over the first two features. Every stratum keeps
+        a few points so rare classes and sparse regions stay visible; the
+        rest of the budget is shared in proportion to stratum size. With
+        more strata than budget, budget strata drawn by size keep one each.
+        """
+        n = len(X)
+        if not budget or n <= budget:
+            return None
+        
+        if is_classification:
+            strata = np.asarray(y)
+        else:
+            low, high = X[:, :2].min(axis=0), X[:, :2].max(axis=0)
+            cell = ((X[:, :2] - low) / np.where(high > low, high - low, 1) * (cells - 1)).astype(int)
+            strata = cell[:, 0] * cells + cell[:, 1]
+        _, inverse, counts = np.unique(strata, return_inverse=True, return_counts=True)
+        
+        rng = np.random.default_rng(0)
+        if len(counts) > budget:
+            # Not even one point per stratum fits
+            quota = np.zeros_like(counts)
+            quota[rng.choice(len(counts), size=budget, replace=False, p=counts / n)] = 1
+        else:
+            floor = np.minimum(counts, max(1, budget // (4 * len(counts))))
+            spare = budget - floor.sum()
+            quota = floor + np.floor((counts - floor) * spare / max(n - floor.sum(), 1)).astype(int)
+        
+        # Rank rows in a fixed random order within their stratum and keep
+        # the first quota of each
+        order = rng.permutation(n)
+        order = order[np.argsort(inverse[order], kind="stable")]
+        rank = np.empty(n, dtype=np.int64)
+        rank[order] = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.flatnonzero(rank < quota[inverse])
+    
+    def _round(self, values):
+        """Round a float array to float_decimals; other arrays pass through"""
+        values = np.asarray(values)
+        if self.float_decimals is None or values.dtype.kind != "f":
+            return values
+        return np.round(values, self.float_decimals)
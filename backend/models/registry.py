@@ -0,0 +1,135 @@
+import io
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+def pack_model(model, info: dict) -> bytes:
+    """Serialize a fitted model and its metadata with joblib"""
+    import joblib
+    
+    buffer = io.BytesIO()
+    joblib.dump({"model": model, "info": info}, buffer)
+    return buffer.getvalue()
+
+
+def unpack_model(payload: bytes):
+    """Return the (model, info) pair stored by pack_model"""
+    import joblib
+    
+    entry = joblib.load(io.BytesIO(payload))
+    return entry["model"], entry["info"]
+
+
+class ModelRegistry:
+    """Fitted models kept after training so they can be reused without refitting
+
+    Models are held as packed bytes in an LRU bounded by their serialized
+    size. When ``directory`` is set they are also persisted as .joblib files
+    and reloaded from there once evicted from memory; otherwise models
+    larger than the whole budget are declined, and the last few declined
+    ids are remembered so their responses can still be served.
+    """
+
+    ID_PATTERN = re.compile(r"^[0-9a-f]{32,64}$")
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, directory: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._declined = OrderedDict()
+        self._lock = threading.Lock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, model_id: str) -> str:
+        return os.path.join(self.directory, f"{model_id}.joblib")
+
+    @property
+    def max_model_bytes(self) -> Optional[int]:
+        """Largest packed model that can be kept, or None when any size can"""
+        return None if self.directory else self.max_bytes
+
+    def __contains__(self, model_id: str) -> bool:
+        if not self.ID_PATTERN.match(model_id):
+            return False
+        with self._lock:
+            if model_id in self._entries:
+                return True
+        return bool(self.directory) and os.path.exists(self._path(model_id))
+
+    def decline(self, model_id: str):
+        """Record that a model was too large to keep"""
+        with self._lock:
+            self._declined[model_id] = True
+            self._declined.move_to_end(model_id)
+            while len(self._declined) > 1024:
+                self._declined.popitem(last=False)
+
+    def declined(self, model_id: str) -> bool:
+        """Whether a model was recently too large to keep"""
+        with self._lock:
+            return model_id in self._declined
+
+    def put(self, model_id: str, payload: bytes):
+        """Register a packed model, evicting least recently used ones"""
+        if not self.ID_PATTERN.match(model_id):
+            raise ValueError(f"Invalid model id: {model_id}")
+
+        if len(payload) <= self.max_bytes:
+            with self._lock:
+                previous = self._entries.pop(model_id, None)
+                if previous is not None:
+                    self._bytes -= len(previous)
+                self._entries[model_id] = payload
+                self._bytes += len(payload)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+
+        if self.directory:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(model_id))
+
+    def file(self, model_id: str) -> Optional[str]:
+        """Path of a model's .joblib file, or None when it is not on disk"""
+        if not self.directory or not self.ID_PATTERN.match(model_id):
+            return None
+        path = self._path(model_id)
+        return path if os.path.exists(path) else None
+
+    def get(self, model_id: str) -> Optional[bytes]:
+        """Return the packed model, or None if it is no longer available"""
+        if not self.ID_PATTERN.match(model_id):
+            return None
+
+        with self._lock:
+            payload = self._entries.get(model_id)
+            if payload is not None:
+                self._entries.move_to_end(model_id)
+                return payload
+
+        if self.directory:
+            try:
+                with open(self._path(model_id), "rb") as f:
+                    return f.read()
+            except OSError:
+                return None
+        return None
+
+    def stats(self) -> dict:
+        """Return model count and memory use"""
+        with self._lock:
+            return {
+                "models": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": self.directory is not None
+            }
@@ -0,0 +1,256 @@
+"""Training entry points that run inside worker processes"""
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from models.ml_models import MLModelTrainer
+from models.registry import pack_model, unpack_model
+from utils.dataset_loader import DatasetLoader
+from utils.dataset_store import DatasetStore
+from utils.metrics import StageTimer
+from utils.projection import PCAProjection
+from utils.payload import dumps
+
+
+# Each worker process keeps its own memoized datasets
+dataset_loader = DatasetLoader(
+    max_bytes=int(os.environ.get("DATASET_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+)
+model_trainer = MLModelTrainer(
+    n_jobs=int(os.environ.get("LEARNING_CURVE_JOBS", 1)),
+    batch_jobs=int(os.environ.get("BATCH_JOBS", 1)),
+    float_decimals=int(os.environ["RESPONSE_FLOAT_DECIMALS"]) if "RESPONSE_FLOAT_DECIMALS" in os.environ else None,
+    point_budget=int(os.environ.get("PLOT_POINT_BUDGET", 5000)) or None
+)
+dataset_store = DatasetStore(
+    os.environ.get("DATASET_STORE_DIR") or os.path.join(tempfile.gettempdir(), "dataviz-datasets"),
+    ttl=float(os.environ.get("DATASET_STORE_TTL", 24 * 3600)),
+    max_bytes=int(os.environ.get("DATASET_STORE_MAX_BYTES", 10 * 1024 ** 3))
+)
+
+# Imported once by the worker fork server, so workers start with scikit-learn
+# loaded while the API process itself never imports it
+PRELOAD_MODULES = [
+    "models.tasks", "sklearn.datasets", "sklearn.metrics", "sklearn.model_selection",
+    *model_trainer.models.modules()
+]
+
+# Queue carrying (job_id, stage, body) events back to the API process
+job_events = None
+
+# Unpacked fitted models by id, bounded by their packed size; shared by the
+# threads of the in-process fallback
+model_cache = OrderedDict()
+model_cache_bytes = 0
+model_cache_max_bytes = int(os.environ.get("WORKER_MODEL_CACHE_BYTES", 128 * 1024 * 1024))
+model_cache_lock = threading.Lock()
+
+
+class ModelNotLoaded(LookupError):
+    """Raised when a worker needs the packed model it was not sent"""
+
+
+def init_worker(events):
+    """Prepare a freshly started worker"""
+    global job_events
+    job_events = events
+    if hasattr(events, "cancel_join_thread"):
+        # Never block worker shutdown on events nobody will read
+        events.cancel_join_thread()
+    dataset_loader.warm()
+
+
+def load_dataset(dataset: str, n_samples: int, all_features: bool = False):
+    """Load a built-in dataset by name or an uploaded one by id
+
+    Without all_features only the first two features are returned.
+    """
+    if dataset in dataset_store:
+        X, y = dataset_store.get(dataset)
+        return (X, y) if all_features else (X[:, :2], y)
+    return dataset_loader.load_dataset(dataset, n_samples, all_features)
+
+
+def load_projection(dataset: str, n_samples: int, X):
+    """2-D projection of a multi-feature dataset, fitted once per dataset
+
+    Projections of uploads are stored next to the data and shared by all
+    workers; those of built-in datasets are memoized per worker.
+    """
+    if X.shape[1] <= 2:
+        return None
+    if dataset not in dataset_store:
+        return dataset_loader.load_projection(dataset, n_samples)
+    
+    projection = dataset_store.get_projection(dataset)
+    if projection is None:
+        projection = PCAProjection.fit(X)
+        dataset_store.put_projection(dataset, projection)
+    return projection
+
+
+def _keep_model(packed: list, timer: StageTimer, max_bytes: int = None):
+    """on_fit callback packing the fitted model into packed unless it exceeds max_bytes"""
+    def keep(model, info):
+        with timer.stage("pack"):
+            payload = pack_model(model, info)
+        if max_bytes is not None and len(payload) > max_bytes:
+            return False
+        packed.append(payload)
+        return True
+    return keep
+
+
+def train_builtin(algorithm: str, dataset: str, n_samples: int, parameters: dict, options: dict,
+                  model_id: str = None, max_model_bytes: int = None):
+    """Train on a built-in or uploaded dataset
+
+    Returns the serialized response, the packed fitted model for the
+    registry when model_id is given (otherwise None), and the seconds
+    spent in each stage. Models packing to more than max_model_bytes are
+    not kept, and the response then has no model_id.
+    """
+    options = dict(options)
+    all_features = options.pop("all_features", False)
+    timer = StageTimer()
+    with timer.stage("load"):
+        X, y = load_dataset(dataset, n_samples, all_features)
+        options["projection"] = load_projection(dataset, n_samples, X)
+    return _train(algorithm, X, y, parameters, options, model_id, max_model_bytes, timer)
+
+
+def _train(algorithm, X, y, parameters, options, model_id, max_model_bytes, timer):
+    options = dict(options)
+    include_timings = options.pop("include_timings", False)
+    packed = []
+    result = model_trainer.train(
+        algorithm=algorithm,
+        X=X,
+        y=y,
+        parameters=parameters,
+        model_id=model_id,
+        on_fit=_keep_model(packed, timer, max_model_bytes) if model_id else None,
+        timer=timer,
+        **options
+    )
+    # Serialization is timed too, but can only be reported to the API process
+    if include_timings:
+        result["timings"] = dict(timer.timings)
+    with timer.stage("serialize"):
+        body = dumps(result)
+    return body, packed[0] if packed else None, timer.timings
+
+
+def load_model(model_id: str, source=None):
+    """Return the (model, info) pair of a registered model, unpacked once per worker
+
+    source is the packed model or the path of its .joblib file. Without it
+    only models this worker already holds can be used; others raise
+    ModelNotLoaded so the caller can send them.
+    """
+    global model_cache_bytes
+    with model_cache_lock:
+        entry = model_cache.get(model_id)
+        if entry is not None:
+            model_cache.move_to_end(model_id)
+            return entry[0]
+    if source is None:
+        raise ModelNotLoaded(model_id)
+
+    if isinstance(source, str):
+        with open(source, "rb") as f:
+            source = f.read()
+    loaded = unpack_model(source)
+    size = len(source)
+    if size <= model_cache_max_bytes:
+        with model_cache_lock:
+            if model_id not in model_cache:
+                model_cache[model_id] = (loaded, size)
+                model_cache_bytes += size
+            while model_cache_bytes > model_cache_max_bytes:
+                _, (_, evicted) = model_cache.popitem(last=False)
+                model_cache_bytes -= evicted
+    return loaded
+
+
+def predict(model_id: str, source, points, probabilities: bool) -> bytes:
+    """Predict points with a registered model and return the serialized response"""
+    model, info = load_model(model_id, source)
+    return dumps(model_trainer.predict_points(model, points, probabilities, info))
+
+
+def predict_viewport(model_id: str, source, viewport: dict, boundary_format: str) -> bytes:
+    """Evaluate a registered model over a viewport and return the serialized response"""
+    model, info = load_model(model_id, source)
+    boundary = model_trainer.predict_viewport(
+        model, info,
+        x_range=viewport.get("x_range") or info["bounds"][0],
+        y_range=viewport.get("y_range") or info["bounds"][1],
+        resolution=viewport.get("resolution"),
+        boundary_format=boundary_format,
+        confidence=viewport.get("confidence", False)
+    )
+    return dumps({"decision_boundary": boundary})
+
+
+def learning_curves_builtin(algorithm: str, dataset: str, n_samples: int, parameters: dict,
+                            all_features: bool = False) -> bytes:
+    """Compute learning curves on a built-in or uploaded dataset and return the serialized response"""
+    X, y = load_dataset(dataset, n_samples, all_features)
+    result = model_trainer.learning_curves(algorithm, X, y, parameters)
+    return dumps({"success": True, "learning_curves": result})
+
+
+def train_batch(algorithm: str, dataset: str, n_samples: int, parameter_sets: list,
+                options: dict) -> bytes:
+    """Train a parameter sweep on one dataset and return the serialized response"""
+    options = dict(options)
+    X, y = load_dataset(dataset, n_samples, options.pop("all_features", False))
+    if options.get("include_boundaries"):
+        options["projection"] = load_projection(dataset, n_samples, X)
+    result = model_trainer.train_batch(algorithm, X, y, parameter_sets, **options)
+    return dumps(result)
+
+
+def predict_tile(model_id: str, source, z: int, x: int, y: int, size: int,
+                 boundary_format: str) -> bytes:
+    """Evaluate one boundary tile of a registered model and return the serialized response"""
+    model, info = load_model(model_id, source)
+    return dumps(model_trainer.predict_tile(model, info, z, x, y, size, boundary_format))
+
+
+def train_arrays(algorithm: str, X, y, parameters: dict, options: dict, model_id: str = None,
+                 max_model_bytes: int = None):
+    """Train on uploaded arrays; returns the same triple as train_builtin"""
+    return _train(algorithm, X, y, parameters, options, model_id, max_model_bytes, StageTimer())
+
+
+def train_job(job_id: str, algorithm: str, dataset: str, n_samples: int, parameters: dict,
+              options: dict, model_id: str = None, max_model_bytes: int = None):
+    """Train on a built-in or uploaded dataset, publishing each stage as it completes
+
+    Returns the packed fitted model when model_id is given and it was kept
+    (otherwise None) and the seconds spent in each stage; the API process
+    assembles the response from the published stages.
+    """
+    options = dict(options)
+    options.pop("include_timings", False)
+    all_features = options.pop("all_features", False)
+    timer = StageTimer()
+    packed = []
+    with timer.stage("load"):
+        X, y = load_dataset(dataset, n_samples, all_features)
+        options["projection"] = load_projection(dataset, n_samples, X)
+    stages = model_trainer.train_stages(
+        algorithm, X, y, parameters,
+        model_id=model_id,
+        on_fit=_keep_model(packed, timer, max_model_bytes) if model_id else None,
+        timer=timer,
+        **options
+    )
+    for stage, result in stages:
+        with timer.stage("serialize"):
+            body = dumps(result)
+        job_events.put((job_id, stage, body))
+    return packed[0] if packed else None, timer.timings
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from models.ml_models import MLModelTrainer
+from utils.dataset_loader import DatasetLoader
+
+
+trainer = MLModelTrainer()
+loader = DatasetLoader()
+
+
+def adaptive_and_full(algorithm, dataset, **parameters):
+    X, y = loader.load_dataset(dataset, 300)
+    model = trainer.models[algorithm](**parameters).fit(X, y)
+    xs, ys = trainer._boundary_axes(X, trainer.boundary_resolution)
+
+    evaluated = 0
+
+    def predict(points):
+        nonlocal evaluated
+        evaluated += len(points)
+        return model.predict(points)
+
+    Z = trainer._predict_adaptive(predict, xs, ys)
+    xx, yy = np.meshgrid(xs, ys)
+    full = model.predict(np.c_[xx.ravel(), yy.ravel()]).reshape(xx.shape)
+    return Z, full, evaluated / full.size
+
+
+@pytest.mark.parametrize("algorithm, dataset", [
+    ("decision_tree", "moons"),
+    ("decision_tree", "breast_cancer"),
+    ("random_forest", "moons"),
+    ("knn", "circles"),
+])
+def test_mismatch_and_evaluated_fraction_are_bounded(algorithm, dataset):
+    parameters = {} if algorithm == "knn" else {"random_state": 0}
+    Z, full, fraction = adaptive_and_full(algorithm, dataset, **parameters)
+    # Thin regions inside a 4x4 cell are missed (about 0.9% for a tree on moons)
+    assert (Z != full).mean() < 0.015
+    # The coarse lattice alone is 1/16 of the mesh; refinement stays local
+    assert 1 / 16 <= fraction < 0.15
+
+
+@pytest.mark.parametrize("dataset", ["moons", "iris", "breast_cancer"])
+def test_linear_boundaries_are_exact(dataset):
+    # A straight boundary crossing a cell always separates two of its corners
+    Z, full, _ = adaptive_and_full("logistic_regression", dataset, max_iter=1000)
+    assert np.array_equal(Z, full)
+
+
+@pytest.mark.parametrize("resolution", [10, 13, 50, 301, 1000])
+def test_mesh_respects_the_resolution_cap(resolution):
+    X = np.array([[-1000.0, -1000.0], [1000.0, 1000.0]])
+    xs, ys = trainer._boundary_axes(X, resolution)
+    assert len(xs) <= resolution and len(ys) <= resolution
+    # The coarse lattice still lands on both edges
+    assert (len(xs) - 1) % trainer.boundary_block == 0
+
+    model = trainer.models["logistic_regression"]().fit(X, [0, 1])
+    info = {"classification": True}
+    boundary = trainer.predict_viewport(model, info, (-1, 1), (-1, 1), resolution=resolution,
+                                        boundary_format="compact")
+    assert boundary["x_axis"]["count"] <= resolution
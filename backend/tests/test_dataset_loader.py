@@ -0,0 +1,60 @@
+import io
+import tempfile
+
+import numpy as np
+import pytest
+
+from utils import dataset_loader
+from utils.dataset_loader import DatasetLoader
+
+
+def test_generated_datasets_are_shared_across_feature_modes():
+    loader = DatasetLoader()
+    X, _ = loader.load_dataset("moons", 500)
+    assert loader.load_dataset("moons", 500, all_features=True)[0] is X
+    assert not X.flags.writeable
+
+    # Bundled datasets differ by feature mode but not by n_samples
+    two = loader.load_dataset("wine", 100)[0]
+    assert loader.load_dataset("wine", 999)[0] is two
+    assert loader.load_dataset("wine", 100, all_features=True)[0].shape[1] == 13
+
+
+def test_memo_is_bounded_by_bytes():
+    loader = DatasetLoader(max_bytes=3 * 1000 * 24)
+    for n in (1000, 1001, 1002, 1003):
+        loader.load_dataset("moons", n)
+    assert loader._bytes <= loader.max_bytes
+    assert ("moons", 1000, False) not in loader._cache
+    assert ("moons", 1003, False) in loader._cache
+
+    # Datasets larger than the whole budget are returned but not kept
+    X, _ = loader.load_dataset("moons", 10_000)
+    assert len(X) == 10_000 and ("moons", 10_000, False) not in loader._cache
+
+
+CSV = b"a,a,b,target\n1,2,3,x\n4,5,6,y\n7,8,9,x\n"
+
+
+@pytest.mark.parametrize("arrow", [True, False])
+@pytest.mark.parametrize("all_features", [False, True])
+def test_csv_columns_are_picked_by_position(monkeypatch, arrow, all_features):
+    monkeypatch.setattr(dataset_loader, "_has_pyarrow", lambda: arrow)
+    with tempfile.SpooledTemporaryFile() as file:
+        file.write(CSV)
+        X, y = DatasetLoader().load_custom_file(file, chunksize=2, all_features=all_features)
+
+    expected = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]], dtype=np.float32)
+    assert X.dtype == np.float32
+    assert np.array_equal(X, expected if all_features else expected[:, :2])
+    assert list(y) == ["x", "y", "x"]
+
+
+def test_csv_text_and_size_limit():
+    X, y = DatasetLoader().load_custom_dataset("f,t\n0.5,1\n1.5,0\n")
+    assert X.shape == (2, 1) and list(y) == [1, 0]
+
+    with pytest.raises(ValueError, match="byte limit"):
+        DatasetLoader().load_custom_file(io.BytesIO(CSV), max_bytes=10)
+    with pytest.raises(ValueError, match="at least one feature"):
+        DatasetLoader().load_custom_file(io.BytesIO(b"only\n1\n"))
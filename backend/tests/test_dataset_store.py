@@ -0,0 +1,47 @@
+import os
+import time
+
+import numpy as np
+
+from utils.dataset_store import DatasetStore
+
+
+def age(store, dataset_id, seconds):
+    path = os.path.join(store.directory, dataset_id)
+    os.utime(path, (time.time() - seconds, time.time() - seconds))
+
+
+def test_identical_uploads_share_an_id(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    X, y = np.arange(20.0).reshape(10, 2), np.array(list("ababababab"), dtype=object)
+    dataset_id = store.put(X, y)
+    assert store.put(X.copy(), y.copy()) == dataset_id
+
+    X_read, y_read = store.get(dataset_id)
+    assert np.array_equal(X_read, X) and y_read.tolist() == y.tolist()
+
+
+def test_reads_evict_expired_datasets_without_new_uploads(tmp_path):
+    store = DatasetStore(str(tmp_path), ttl=3600, evict_interval=0)
+    stale = store.put(np.zeros((4, 2)), np.zeros(4))
+    fresh = store.put(np.ones((4, 2)), np.zeros(4))
+    age(store, stale, 7200)
+
+    store.get(fresh)
+    assert stale not in store
+    assert fresh in store
+
+
+def test_read_eviction_is_throttled(tmp_path):
+    store = DatasetStore(str(tmp_path), ttl=3600, evict_interval=600)
+    stale = store.put(np.zeros((4, 2)), np.zeros(4))
+    fresh = store.put(np.ones((4, 2)), np.zeros(4))
+    age(store, stale, 7200)
+
+    # The upload just evicted, so this read does not scan again
+    store.get(fresh)
+    assert stale in store
+
+    store._last_evict -= 601
+    store.get(fresh)
+    assert stale not in store
@@ -0,0 +1,81 @@
+import asyncio
+
+from utils.jobs import JobManager
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+async def collect(manager, job):
+    return [event async for event in manager.stream(job)]
+
+
+def test_stream_replays_then_releases_bodies():
+    async def main():
+        manager = JobManager()
+        job = manager.create()
+        manager.publish(job.id, "metrics", b"{}")
+        stream = asyncio.ensure_future(collect(manager, job))
+        await asyncio.sleep(0)
+        manager.publish(job.id, "done", b'{"success":true}')
+        events = await stream
+
+        assert events == [("metrics", b"{}"), ("done", b'{"success":true}')]
+        assert job.released and job.info()["stages"] == ["metrics", "done"]
+        assert manager.stats()["bytes"] == 0
+
+    run(main())
+
+
+def test_finished_jobs_expire_and_respect_byte_budget(monkeypatch):
+    async def main():
+        manager = JobManager(max_bytes=250, ttl=60)
+        clock = [0.0]
+        monkeypatch.setattr("utils.jobs.time.monotonic", lambda: clock[0])
+
+        jobs = [manager.create() for _ in range(3)]
+        for job in jobs:
+            manager.publish(job.id, "metrics", b"x" * 100)
+        manager.publish(jobs[0].id, "done", b"{}")
+        manager.publish(jobs[1].id, "done", b"{}")
+        # 300 bytes held: the oldest finished job goes, the running one stays
+        assert manager.get(jobs[0].id) is None
+        assert manager.get(jobs[1].id) is not None
+        assert manager.get(jobs[2].id) is not None
+
+        clock[0] = 61
+        manager.create()
+        assert manager.get(jobs[1].id) is None
+        assert manager.get(jobs[2].id) is not None
+
+    run(main())
+
+
+def test_wait_returns_once_enough_events_arrived():
+    async def main():
+        manager = JobManager()
+        job = manager.create()
+        waiter = asyncio.ensure_future(manager.wait(job, 2))
+        manager.publish(job.id, "metrics", b"{}")
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        manager.publish(job.id, "decision_boundary", b"{}")
+        await asyncio.wait_for(waiter, 1)
+
+    run(main())
+
+
+def test_followers_mirror_past_and_future_events():
+    async def main():
+        manager = JobManager()
+        leader, follower = manager.create(), manager.create()
+        manager.publish(leader.id, "metrics", b"{}")
+        manager.follow(follower, leader)
+        manager.publish(leader.id, "decision_boundary", b"{}")
+        manager.publish(leader.id, "done", b"{}")
+
+        assert [stage for stage, _ in follower.events] == ["metrics", "decision_boundary", "done"]
+        assert follower.status == "done"
+
+    run(main())
@@ -0,0 +1,42 @@
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from models import tasks
+from models.registry import pack_model
+
+
+@pytest.fixture
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(tasks, "model_cache", type(tasks.model_cache)())
+    monkeypatch.setattr(tasks, "model_cache_bytes", 0)
+    return tasks.model_cache
+
+
+def packed(depth):
+    model = DecisionTreeClassifier(max_depth=depth).fit([[0, 0], [1, 1], [2, 0]], [0, 1, 0])
+    return pack_model(model, {"depth": depth})
+
+
+def test_models_are_unpacked_once_and_reused(empty_cache):
+    with pytest.raises(tasks.ModelNotLoaded):
+        tasks.load_model("a" * 32)
+
+    model, info = tasks.load_model("a" * 32, packed(1))
+    assert info == {"depth": 1}
+    # Later calls need no payload
+    assert tasks.load_model("a" * 32)[0] is model
+
+
+def test_models_load_from_registry_files(empty_cache, tmp_path):
+    path = tmp_path / "model.joblib"
+    path.write_bytes(packed(2))
+    assert tasks.load_model("b" * 32, str(path))[1] == {"depth": 2}
+
+
+def test_cache_is_bounded_by_packed_size(empty_cache, monkeypatch):
+    payload = packed(1)
+    monkeypatch.setattr(tasks, "model_cache_max_bytes", 2 * len(payload))
+    for model_id in ("1" * 32, "2" * 32, "3" * 32):
+        tasks.load_model(model_id, payload)
+    assert list(empty_cache) == ["2" * 32, "3" * 32]
+    assert tasks.model_cache_bytes == 2 * len(payload)
@@ -0,0 +1,78 @@
+import base64
+
+import numpy as np
+import pytest
+
+from utils.payload import dumps, encode_axis, encode_labels, loads, merge_objects
+
+
+def decode_typed(encoded, data=None):
+    buffer = base64.b64decode(data or encoded["data"])
+    return np.frombuffer(buffer, dtype=np.dtype(encoded["dtype"]).newbyteorder("<"))
+
+
+def decode_labels(encoded):
+    """Reference decoder mirroring decodeLabels in frontend/src/utils/boundary.js"""
+    values = decode_typed(encoded)
+    if encoded["encoding"] == "rle":
+        lengths = np.frombuffer(base64.b64decode(encoded["lengths"]), dtype="<u4")
+        values = np.repeat(values, lengths)
+    values = values.reshape(encoded["shape"])
+    if encoded["classes"] is None:
+        return values
+    return np.asarray(encoded["classes"])[values]
+
+
+def test_uniform_regions_are_run_length_encoded():
+    Z = np.zeros((50, 60), dtype=int)
+    Z[:, 30:] = 1
+    Z[10:20, 5:8] = 2
+    encoded = encode_labels(Z)
+    assert encoded["encoding"] == "rle"
+    assert np.array_equal(decode_labels(encoded), Z)
+
+
+def test_noisy_labels_fall_back_to_raw_indices():
+    Z = np.random.default_rng(0).integers(0, 3, size=(40, 40))
+    encoded = encode_labels(Z)
+    assert encoded["encoding"] == "raw"
+    assert encoded["dtype"] == "uint8"
+    assert np.array_equal(decode_labels(encoded), Z)
+
+
+def test_string_classes_and_wide_class_tables_round_trip():
+    labels = np.array(["setosa", "versicolor", "virginica"])[np.repeat([0, 2, 1], 100)]
+    assert np.array_equal(decode_labels(encode_labels(labels)), labels)
+
+    many = np.repeat(np.arange(300), 5).reshape(30, 50)
+    encoded = encode_labels(many)
+    assert encoded["dtype"] == "uint16"
+    assert np.array_equal(decode_labels(encoded), many)
+
+
+@pytest.mark.parametrize("shape", [(0,), (1,), (1, 1)])
+def test_degenerate_shapes_round_trip(shape):
+    Z = np.zeros(shape, dtype=int)
+    assert decode_labels(encode_labels(Z)).shape == shape
+
+
+def test_regression_values_are_sent_as_float32():
+    values = np.linspace(0, 1, 12).reshape(3, 4)
+    encoded = encode_labels(values, classification=False)
+    assert encoded["encoding"] == "raw" and encoded["classes"] is None
+    assert np.allclose(decode_labels(encoded), values.astype(np.float32))
+
+
+def test_axis_and_arrays_survive_serialization():
+    axis = np.linspace(-2, 3, 11)
+    encoded = encode_axis(axis)
+    assert np.allclose(encoded["start"] + encoded["step"] * np.arange(encoded["count"]), axis)
+
+    body = loads(dumps({"a": np.arange(3), "b": np.float32(0.5), "c": np.array(["x", "y"])}))
+    assert body == {"a": [0, 1, 2], "b": 0.5, "c": ["x", "y"]}
+
+
+def test_merged_stage_bodies_equal_the_whole_response():
+    stages = [{"success": True, "model_id": None}, {"decision_boundary": {"z": [1, 2]}}, {}, {"tree": None}]
+    merged = loads(merge_objects([dumps(stage) for stage in stages]))
+    assert merged == {"success": True, "model_id": None, "decision_boundary": {"z": [1, 2]}, "tree": None}
@@ -0,0 +1,61 @@
+import numpy as np
+
+from models.ml_models import MLModelTrainer
+
+
+trainer = MLModelTrainer()
+
+
+def test_small_datasets_are_plotted_whole():
+    X = np.zeros((100, 2))
+    assert trainer._plot_sample(X, np.zeros(100), True, budget=100) is None
+    assert trainer._plot_sample(X, np.zeros(100), True, budget=None) is None
+
+
+def test_class_quotas_respect_budget_and_keep_rare_classes():
+    rng = np.random.default_rng(1)
+    y = np.r_[np.zeros(50_000), np.ones(9_990), np.full(10, 2)]
+    X = rng.normal(size=(len(y), 2))
+
+    rows = trainer._plot_sample(X, y, True, budget=1000)
+    assert len(rows) <= 1000
+    assert np.all(np.diff(rows) > 0)
+
+    counts = np.bincount(y[rows].astype(int), minlength=3)
+    # Every class keeps its floor of budget / (4 * classes) points, or all
+    # of them when it is smaller
+    assert counts[2] == 10
+    assert counts[1] >= 1000 // 12
+    # The rest is shared roughly in proportion to class size
+    assert counts[0] > 3 * counts[1]
+
+
+def test_sample_is_deterministic():
+    y = np.repeat([0, 1], 5000)
+    X = np.random.default_rng(2).normal(size=(len(y), 2))
+    first = trainer._plot_sample(X, y, True, budget=500)
+    assert np.array_equal(first, trainer._plot_sample(X, y, True, budget=500))
+
+
+def test_regression_sampling_covers_sparse_cells():
+    rng = np.random.default_rng(3)
+    X = np.r_[rng.normal(0, 0.05, size=(20_000, 2)), [[5, 5], [-5, 5], [5, -5]]]
+    y = X.sum(axis=1)
+
+    rows = trainer._plot_sample(X, y, False, budget=800)
+    assert len(rows) <= 800
+    # Outliers are alone in their grid cells and must survive sampling
+    assert {20_000, 20_001, 20_002} <= set(rows.tolist())
+
+
+def test_more_strata_than_budget_stays_within_budget():
+    rng = np.random.default_rng(4)
+    X = rng.uniform(size=(20_000, 2))
+    rows = trainer._plot_sample(X, X.sum(axis=1), False, budget=10)
+    assert len(rows) == 10
+    assert np.all(np.diff(rows) > 0)
+
+    y = np.arange(20_000) % 50
+    rows = trainer._plot_sample(X, y, True, budget=10)
+    # One point from each of ten distinct classes
+    assert len(np.unique(y[rows])) == len(rows) == 10
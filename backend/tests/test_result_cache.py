@@ -0,0 +1,53 @@
+import os
+import time
+
+from utils.result_cache import ResultCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=30)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    cache.put("c", b"x" * 10)
+    assert cache.get("a") is not None
+    cache.put("d", b"x" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_disk_tier_is_reloaded_and_bounded(tmp_path):
+    cache = ResultCache(max_bytes=1000, directory=str(tmp_path), disk_max_bytes=400)
+    for i in range(4):
+        cache.put(f"key{i}", b"x" * 100)
+        # Spread mtimes so the eviction order is well defined
+        os.utime(tmp_path / f"key{i}.json", (time.time() - 100 + i, time.time() - 100 + i))
+    assert cache.stats()["disk_bytes"] == 400
+
+    # A restarted cache finds the entries on disk and refreshes their mtime
+    assert ResultCache(directory=str(tmp_path), disk_max_bytes=400).get("key0") == b"x" * 100
+
+    cache.put("key4", b"x" * 100)
+    # Over budget: oldest files go until three quarters of it remain
+    remaining = sorted(p.name for p in tmp_path.glob("*.json"))
+    assert remaining == ["key0.json", "key3.json", "key4.json"]
+    assert cache.stats()["disk_bytes"] == 300
+
+
+def test_existing_directory_is_trimmed_on_start(tmp_path):
+    for i in range(10):
+        (tmp_path / f"key{i}.json").write_bytes(b"x" * 100)
+    (tmp_path / "unrelated.txt").write_bytes(b"x" * 1000)
+
+    cache = ResultCache(directory=str(tmp_path), disk_max_bytes=500)
+    assert cache.stats()["disk_bytes"] <= 375
+    assert (tmp_path / "unrelated.txt").exists()
+
+
+def test_stale_lookups_count_as_misses():
+    cache = ResultCache()
+    cache.put("a", b"x")
+    cache.record_miss()
+    assert cache.get("a") == b"x"
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
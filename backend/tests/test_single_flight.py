@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    async def main():
+        flights = SingleFlight()
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"body"
+
+        results = await asyncio.gather(*[flights.run("key", compute) for _ in range(5)])
+        assert results == [b"body"] * 5
+        assert len(calls) == 1
+        assert flights.stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+        # Finished flights are not reused
+        await flights.run("key", compute)
+        assert len(calls) == 2
+
+    asyncio.run(main())
+
+
+def test_errors_reach_every_caller_and_early_errors_only_the_first():
+    async def main():
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("bad")
+
+        results = await asyncio.gather(flights.run("key", fail), flights.run("key", fail),
+                                       return_exceptions=True)
+        assert [type(r) for r in results] == [ValueError, ValueError]
+
+        def saturated():
+            raise RuntimeError("queue full")
+
+        with pytest.raises(RuntimeError):
+            flights.run("other", saturated)
+        assert "other" not in flights
+        assert flights.stats()["leaders"] == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def main():
+        flights = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.02)
+            return 1
+
+        first = asyncio.ensure_future(flights.run("key", compute))
+        second = flights.run("key", compute)
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == 1
+
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from sklearn.tree import DecisionTreeClassifier
+
+from models.ml_models import MLModelTrainer
+from utils.dataset_loader import DatasetLoader
+
+
+trainer = MLModelTrainer()
+
+
+def reference_nodes(tree, max_depth=None):
+    """Walk the fitted tree recursively, the way the export used to"""
+    nodes = {}
+
+    def visit(node, depth, parent, position):
+        leaf = tree.children_left[node] == -1
+        nodes[f"node_{node}_{depth}"] = {
+            "parent": parent,
+            "position": position,
+            "depth": depth,
+            "is_leaf": leaf,
+            "truncated": not leaf and depth == max_depth,
+            "samples": int(tree.n_node_samples[node])
+        }
+        if leaf or depth == max_depth:
+            return
+        node_id = f"node_{node}_{depth}"
+        visit(tree.children_left[node], depth + 1, node_id, "left")
+        visit(tree.children_right[node], depth + 1, node_id, "right")
+
+    visit(0, 0, None, "root")
+    return nodes
+
+
+@pytest.fixture(scope="module")
+def model():
+    X, y = DatasetLoader().load_dataset("moons", 1000)
+    return DecisionTreeClassifier(random_state=0).fit(X, y)
+
+
+@pytest.mark.parametrize("max_depth", [None, 0, 1, 3])
+def test_records_match_a_recursive_walk(model, max_depth):
+    exported = trainer._export_tree_structure(model, None, max_depth=max_depth)
+    expected = reference_nodes(model.tree_, max_depth)
+
+    nodes = {node["id"]: node for node in exported["nodes"]}
+    assert nodes.keys() == expected.keys()
+    for node_id, node in expected.items():
+        assert {key: nodes[node_id][key] for key in node} == node
+    assert exported["max_depth"] == max(node["depth"] for node in expected.values())
+    assert sorted((edge["from"], edge["to"]) for edge in exported["edges"]) == sorted(
+        (node["parent"], node_id) for node_id, node in expected.items() if node["parent"]
+    )
+
+
+def test_columnar_format_matches_records(model):
+    records = trainer._export_tree_structure(model, None, max_depth=4)
+    columns = trainer._export_tree_structure(model, None, max_depth=4, tree_format="columnar")
+
+    assert columns["ids"] == [node["id"] for node in records["nodes"]]
+    assert columns["labels"] == [node["label"] for node in records["nodes"]]
+    parents = [columns["ids"][p] if p >= 0 else None for p in np.asarray(columns["parents"])]
+    assert parents == [node["parent"] for node in records["nodes"]]
+    assert np.asarray(columns["truncated"]).tolist() == [node["truncated"] for node in records["nodes"]]
+
+
+def test_labels_describe_splits_and_leaves(model):
+    nodes = trainer._export_tree_structure(model, None, max_depth=1)["nodes"]
+    root = nodes[0]
+    tree = model.tree_
+    assert root["label"] == (
+        f"Feature {tree.feature[0] + 1}\n≤ {tree.threshold[0]:.2f}\nsamples: {tree.n_node_samples[0]}"
+    )
+
+    stump = DecisionTreeClassifier(max_depth=1, random_state=0).fit([[0], [1]], [0, 1])
+    leaves = [n for n in trainer._export_tree_structure(stump, None)["nodes"] if n["is_leaf"]]
+    assert sorted(n["label"] for n in leaves) == ["Class: 0\nsamples: 1", "Class: 1\nsamples: 1"]
+
+
+def test_missing_tree_estimator_fails_before_any_stage():
+    X, y = DatasetLoader().load_dataset("moons", 200)
+    stages = trainer.train_stages(
+        "random_forest", X, y, {"n_estimators": 5}, tree_estimator=5, include_learning_curves=False
+    )
+    with pytest.raises(ValueError, match="below 5"):
+        next(stages)
@@ -0,0 +1,64 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+import time
+
+import pytest
+
+from utils import worker_pool
+from utils.worker_pool import PoolSaturatedError, TrainingPool
+
+
+def test_default_worker_count_is_capped(monkeypatch):
+    monkeypatch.setattr(worker_pool, "available_cpus", lambda: 64)
+    pool = TrainingPool()
+    assert pool.max_workers == TrainingPool.default_cap
+    assert pool.max_pending == 2 * TrainingPool.default_cap
+
+
+@pytest.mark.parametrize("error", [ValueError("cannot find context for 'forkserver'"),
+                                   ImportError("This platform lacks a functioning sem_open")])
+def test_falls_back_to_threads_without_worker_processes(monkeypatch, error):
+    def unavailable(method=None):
+        raise error
+
+    monkeypatch.setattr(multiprocessing, "get_context", unavailable)
+    with pytest.warns(UserWarning, match="training in threads"):
+        pool = TrainingPool(max_workers=3)
+    assert pool.max_workers == 0
+    assert isinstance(pool.events, queue.Queue)
+    assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6
+
+
+def test_saturated_pool_fails_fast():
+    pool = TrainingPool(max_workers=0, max_pending=1)
+
+    async def main():
+        first = pool.submit(sum, [1])
+        with pytest.raises(PoolSaturatedError):
+            pool.submit(sum, [2])
+        return await first
+
+    assert asyncio.run(main()) == 1
+
+
+def test_thread_mode_initializes_off_the_event_loop():
+    initialized = []
+
+    def initializer(events):
+        initialized.append(threading.current_thread())
+        time.sleep(0.2)
+
+    pool = TrainingPool(max_workers=0, initializer=initializer)
+
+    async def main():
+        start = time.perf_counter()
+        future = pool.submit(sum, [1, 2])
+        assert time.perf_counter() - start < 0.1
+        results = await asyncio.gather(future, pool.run(sum, [3]))
+        return results
+
+    assert asyncio.run(main()) == [3, 3]
+    assert len(initialized) == 1
+    assert initialized[0] is not threading.main_thread()
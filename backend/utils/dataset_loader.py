@@ -1,34 +1,123 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
-import pandas as pd
-from sklearn.datasets import (
-    make_moons, make_circles, load_iris, make_regression,
-    load_wine, load_breast_cancer, make_blobs, make_classification
-)
+
+from utils.projection import PCAProjection
 
 
 class DatasetLoader:
     """Load and prepare datasets for ML visualization"""
-    
-    def load_dataset(self, dataset_name: str, n_samples: int = 300):
-        """Load dataset by name"""
+
+    BUILTIN_DATASETS = (
+        "moons", "circles", "iris", "wine", "breast_cancer", "blobs", "classification", "linear"
+    )
+    # Bundled datasets have a fixed size, so n_samples does not apply to them
+    FIXED_SIZE_DATASETS = ("iris", "wine", "breast_cancer")
+
+    def __init__(self, max_bytes: int = 128 * 1024 * 1024):
+        # Memoized arrays and projections, least recently used first,
+        # bounded by the size of their arrays
+        self.max_bytes = max_bytes
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            self._cache.move_to_end(key)
+            return entry[0]
+
+    def _put(self, key, value, size: int):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._cache[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._cache.popitem(last=False)
+                self._bytes -= evicted
+
+    def load_dataset(self, dataset_name: str, n_samples: int = 300, all_features: bool = False):
+        """Load dataset by name, shared read-only across requests
+
+        Bundled datasets are cut to their first two features unless
+        all_features is set.
+        """
+        if dataset_name in self.FIXED_SIZE_DATASETS:
+            n_samples = None
+        else:
+            # Generated datasets only have two features
+            all_features = False
+        key = (dataset_name, n_samples, all_features)
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        X, y = self._generate_dataset(dataset_name, n_samples, all_features)
+        X = np.ascontiguousarray(X)
+        y = np.ascontiguousarray(y)
+        # Callers receive the same arrays, so guard them against mutation
+        X.setflags(write=False)
+        y.setflags(write=False)
+
+        self._put(key, (X, y), X.nbytes + y.nbytes)
+        return X, y
+
+    def load_projection(self, dataset_name: str, n_samples: int = 300) -> PCAProjection:
+        """2-D projection of a dataset's full feature set, fitted once"""
+        if dataset_name in self.FIXED_SIZE_DATASETS:
+            n_samples = None
+        key = ("projection", dataset_name, n_samples)
+
+        cached = self._get(key)
+        if cached is not None:
+            return cached
+
+        X, _ = self.load_dataset(dataset_name, n_samples, all_features=True)
+        projection = PCAProjection.fit(X)
+
+        self._put(key, projection, sum(a.nbytes for a in projection.to_arrays().values()))
+        return projection
+
+    def warm(self, n_samples: int = 300):
+        """Generate every built-in dataset ahead of the first request"""
+        for dataset_name in self.BUILTIN_DATASETS:
+            self.load_dataset(dataset_name, n_samples)
+
+    def _generate_dataset(self, dataset_name: str, n_samples: int, all_features: bool = False):
+        """Build dataset arrays by name"""
+        from sklearn.datasets import (
+            make_moons, make_circles, load_iris, make_regression,
+            load_wine, load_breast_cancer, make_blobs, make_classification
+        )
+        
+        # Bundled datasets keep every feature only when asked to
+        features = slice(None) if all_features else slice(0, 2)
         if dataset_name == "moons":
             X, y = make_moons(n_samples=n_samples, noise=0.3, random_state=42)
         elif dataset_name == "circles":
             X, y = make_circles(n_samples=n_samples, noise=0.2, factor=0.5, random_state=42)
         elif dataset_name == "iris":
             iris = load_iris()
-            # Use only first 2 features for 2D visualization
-            X = iris.data[:, :2]
+            X = iris.data[:, features]
             y = iris.target
         elif dataset_name == "wine":
             wine = load_wine()
-            # Use first 2 features for 2D visualization
-            X = wine.data[:, :2]
+            X = wine.data[:, features]
             y = wine.target
         elif dataset_name == "breast_cancer":
             cancer = load_breast_cancer()
-            # Use first 2 features for 2D visualization
-            X = cancer.data[:, :2]
+            X = cancer.data[:, features]
             y = cancer.target
         elif dataset_name == "blobs":
             X, y = make_blobs(n_samples=n_samples, centers=3, n_features=2, random_state=42)
@@ -44,17 +133,77 @@ class DatasetLoader:
     
     def load_custom_dataset(self, file_content: str):
         """Load custom CSV dataset"""
-        from io import StringIO
+        return self.load_custom_file(io.StringIO(file_content))
+    
+    def load_custom_file(self, file, max_bytes: int = None, chunksize: int = 100_000,
+                         all_features: bool = False):
+        """Load custom CSV dataset from a file object with bounded memory"""
+        import pandas as pd
+        
+        # Check the size of the (spooled) upload without reading it
+        file.seek(0, os.SEEK_END)
+        size = file.tell()
+        file.seek(0)
+        if max_bytes and size > max_bytes:
+            raise ValueError(f"CSV is {size} bytes, larger than the {max_bytes} byte limit")
         
-        # Read CSV
-        df = pd.read_csv(StringIO(file_content))
+        # Read the header only, then parse just the columns we use. Columns
+        # are picked by position, as header names may repeat
+        n_columns = len(pd.read_csv(file, nrows=0).columns)
+        file.seek(0)
+        if n_columns < 2:
+            raise ValueError("CSV needs at least one feature column and a target column")
         
         # Assume last column is target
-        X = df.iloc[:, :-1].values
-        y = df.iloc[:, -1].values
+        # Unless all features are wanted, use the first 2 for visualization
+        n_features = n_columns - 1 if all_features else min(n_columns - 1, 2)
         
-        # If more than 2 features, use first 2 for visualization
-        if X.shape[1] > 2:
-            X = X[:, :2]
+        if _has_pyarrow() and not isinstance(file, io.TextIOBase):
+            return _read_csv_arrow(file, n_columns, n_features)
+        
+        read_options = {
+            "usecols": list(range(n_features)) + [n_columns - 1],
+            "dtype": {i: np.float32 for i in range(n_features)}
+        }
+        X_chunks, y_chunks = [], []
+        for chunk in pd.read_csv(file, chunksize=chunksize, **read_options):
+            X_chunks.append(chunk.iloc[:, :n_features].to_numpy())
+            y_chunks.append(chunk.iloc[:, -1].to_numpy())
+        X = np.concatenate(X_chunks) if X_chunks else np.empty((0, n_features), np.float32)
+        y = np.concatenate(y_chunks) if y_chunks else np.empty(0)
         
         return X, y
+
+
+def _read_csv_arrow(file, n_columns: int, n_features: int):
+    """Parse the first n_features columns and the last one with pyarrow
+
+    The parser is multithreaded and only materialises the included
+    columns. They are renamed by position, so duplicate names are fine.
+    """
+    import pyarrow as pa
+    from pyarrow import csv
+    
+    names = [str(i) for i in range(n_columns)]
+    features = names[:n_features]
+    table = csv.read_csv(
+        file,
+        read_options=csv.ReadOptions(column_names=names, skip_rows=1),
+        convert_options=csv.ConvertOptions(
+            include_columns=features + names[-1:],
+            column_types={name: pa.float32() for name in features}
+        )
+    )
+    X = np.empty((table.num_rows, n_features), dtype=np.float32)
+    for i, name in enumerate(features):
+        X[:, i] = table.column(name).to_numpy()
+    y = table.column(names[-1]).to_numpy()
+    return X, y
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from utils.projection import PCAProjection
+
+
+class DatasetStore:
+    """Uploaded datasets stored once under a content hash
+
+    Each dataset is a directory holding X.npy and y.npy, opened with
+    mmap_mode="r" so every worker process shares the same pages, and the
+    projection.npz of its 2-D view once one has been fitted. Entries
+    unused for ``ttl`` seconds are removed, then the least recently used
+    ones until the store fits in ``max_bytes``. Eviction runs on every
+    upload and, at most once per ``evict_interval`` seconds, on reads.
+    """
+
+    ID_PATTERN = re.compile(r"^upload-[0-9a-f]{32}$")
+
+    def __init__(self, directory: str, ttl: float = 24 * 3600, max_bytes: int = 10 * 1024 ** 3,
+                 evict_interval: float = 600):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self._last_evict = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, dataset_id: str) -> str:
+        if not self.ID_PATTERN.match(dataset_id):
+            raise ValueError(f"Unknown dataset: {dataset_id}")
+        return os.path.join(self.directory, dataset_id)
+
+    def __contains__(self, dataset_id: str) -> bool:
+        return bool(self.ID_PATTERN.match(dataset_id)) and os.path.isdir(self._path(dataset_id))
+
+    def put(self, X: np.ndarray, y: np.ndarray) -> str:
+        """Store a dataset and return its id"""
+        X = np.ascontiguousarray(X)
+        y = np.asarray(y)
+        # Object arrays need pickle and cannot be memory-mapped
+        if y.dtype == object:
+            y = y.astype(str)
+        y = np.ascontiguousarray(y)
+
+        digest = hashlib.sha256()
+        for array in (X, y):
+            digest.update(f"{array.dtype.str}{array.shape}".encode())
+            digest.update(array.reshape(-1).view(np.uint8))
+        dataset_id = f"upload-{digest.hexdigest()[:32]}"
+        path = self._path(dataset_id)
+
+        if os.path.isdir(path):
+            os.utime(path)
+            return dataset_id
+
+        # Write into a scratch directory and rename it into place atomically
+        scratch = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            np.save(os.path.join(scratch, "X.npy"), X)
+            np.save(os.path.join(scratch, "y.npy"), y)
+            os.rename(scratch, path)
+        except OSError:
+            shutil.rmtree(scratch, ignore_errors=True)
+            if not os.path.isdir(path):
+                raise
+
+        self.evict()
+        return dataset_id
+
+    def get(self, dataset_id: str):
+        """Open a stored dataset as read-only memory-mapped arrays"""
+        path = self._path(dataset_id)
+        try:
+            X = np.load(os.path.join(path, "X.npy"), mmap_mode="r")
+            y = np.load(os.path.join(path, "y.npy"), mmap_mode="r")
+        except FileNotFoundError:
+            raise ValueError(f"Unknown dataset: {dataset_id}")
+        # Record the access so eviction keeps datasets in use
+        os.utime(path)
+        if time.monotonic() - self._last_evict > self.evict_interval:
+            self.evict()
+        return X, y
+
+    def get_projection(self, dataset_id: str):
+        """Return the stored 2-D projection of a dataset, or None"""
+        try:
+            with np.load(os.path.join(self._path(dataset_id), "projection.npz")) as arrays:
+                return PCAProjection.from_arrays(arrays)
+        except (OSError, KeyError):
+            return None
+
+    def put_projection(self, dataset_id: str, projection: PCAProjection):
+        """Store a dataset's projection so every worker reuses it"""
+        path = self._path(dataset_id)
+        fd, tmp_path = tempfile.mkstemp(dir=path, suffix=".npz")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **projection.to_arrays())
+            os.replace(tmp_path, os.path.join(path, "projection.npz"))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def evict(self):
+        """Remove expired datasets, then the oldest ones over the size budget"""
+        self._last_evict = time.monotonic()
+        entries = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not self.ID_PATTERN.match(name):
+                continue
+            try:
+                mtime = os.path.getmtime(path)
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+            except OSError:
+                continue
+            if now - mtime > self.ttl:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                entries.append((mtime, size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
@@ -0,0 +1,164 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional
+
+
+class Job:
+    """A training job and the stage events it has published so far"""
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = "queued"
+        self.events = []
+        self.size = 0
+        self.finished_at = None
+        # Set once the bodies were dropped after being streamed
+        self.released = False
+        # Jobs mirroring this one's events
+        self.followers = []
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "error")
+
+    def info(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stages": [stage for stage, _ in self.events]
+        }
+
+
+class JobManager:
+    """Track training jobs and fan their stage events out to subscribers
+
+    Workers publish (job_id, stage, body) tuples on a queue; a listener
+    thread hands them to the event loop, where streams waiting on the job
+    are woken up.
+
+    A finished job's bodies are dropped once a stream has sent them all.
+    Finished jobs are forgotten after ``ttl`` seconds, and the oldest ones
+    earlier when the jobs hold more than ``max_bytes`` of bodies or number
+    more than ``max_jobs``. Unfinished jobs are always kept; the training
+    queue bounds how many there can be.
+    """
+
+    def __init__(self, max_jobs: int = 256, max_bytes: int = 64 * 1024 * 1024, ttl: float = 300):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._jobs = OrderedDict()
+        self._bytes = 0
+        self._listener = None
+
+    def create(self) -> Job:
+        """Register a new job"""
+        job = Job(uuid.uuid4().hex)
+        self._jobs[job.id] = job
+        self._prune()
+        return job
+
+    def _release(self, job: Job):
+        self._bytes -= job.size
+        job.size = 0
+        job.events = [(stage, None) for stage, _ in job.events]
+        job.released = True
+
+    def _prune(self):
+        """Forget expired finished jobs, then the oldest ones over the limits"""
+        now = time.monotonic()
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in finished:
+            expired = now - job.finished_at > self.ttl
+            if not expired and self._bytes <= self.max_bytes and len(self._jobs) <= self.max_jobs:
+                continue
+            self._release(job)
+            del self._jobs[job.id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def publish(self, job_id: str, stage: str, body: bytes):
+        """Record a stage event and wake up the job's streams"""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return
+
+        job.events.append((stage, body))
+        job.size += len(body)
+        self._bytes += len(body)
+        if stage in ("done", "error"):
+            job.status = stage
+            job.finished_at = time.monotonic()
+        else:
+            job.status = "running"
+
+        changed, job._changed = job._changed, asyncio.Event()
+        changed.set()
+        for follower_id in job.followers:
+            self.publish(follower_id, stage, body)
+        if job.finished:
+            self._prune()
+
+    def follow(self, job: Job, leader: Job):
+        """Mirror the events of a running job onto another, earlier ones first"""
+        for stage, body in leader.events:
+            self.publish(job.id, stage, body)
+        leader.followers.append(job.id)
+
+    async def wait(self, job: Job, count: int):
+        """Wait until a job has published count events or finished"""
+        while True:
+            changed = job._changed
+            if len(job.events) >= count or job.finished:
+                return
+            await changed.wait()
+
+    async def stream(self, job: Job):
+        """Yield (stage, body) events of a job, replaying earlier ones first
+
+        The bodies of a finished job are released once they have all been
+        sent, so a job can be streamed to completion only once.
+        """
+        sent = 0
+        while True:
+            changed = job._changed
+            while sent < len(job.events):
+                stage, body = job.events[sent]
+                if body is None:
+                    # Pruned while this stream was still replaying it
+                    return
+                yield stage, body
+                sent += 1
+            if job.finished:
+                if not job.released:
+                    self._release(job)
+                return
+            await changed.wait()
+
+    def stats(self) -> dict:
+        """Return job count and the size of the bodies they hold"""
+        return {
+            "jobs": len(self._jobs),
+            "running": sum(not job.finished for job in self._jobs.values()),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def listen(self, events):
+        """Forward events from a worker queue to the running event loop"""
+        loop = asyncio.get_running_loop()
+
+        def forward():
+            while True:
+                event = events.get()
+                if event is None:
+                    return
+                loop.call_soon_threadsafe(self.publish, *event)
+
+        self._listener = threading.Thread(target=forward, name="job-events", daemon=True)
+        self._listener.start()
@@ -0,0 +1,102 @@
+import base64
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _encode_numpy(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    """Serialize a response body to compact JSON bytes
+
+    With orjson, numeric NumPy arrays are written straight from their
+    buffers instead of being converted to Python lists first; other arrays
+    (strings, objects, non-contiguous views) fall back to tolist().
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_numpy, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, separators=(",", ":"), default=_encode_numpy).encode("utf-8")
+
+
+def loads(body: bytes):
+    """Parse a JSON response body"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def merge_objects(bodies) -> bytes:
+    """Join serialized JSON objects with distinct keys into one object"""
+    members = [body.strip()[1:-1] for body in bodies]
+    return b"{" + b",".join(member for member in members if member.strip()) + b"}"
+
+
+def encode_typed(values, dtype=None):
+    """Pack an array as a base64 little-endian buffer with its shape"""
+    values = np.asarray(values)
+    if dtype is not None:
+        values = values.astype(dtype)
+    values = np.ascontiguousarray(values, dtype=values.dtype.newbyteorder("<"))
+    return {
+        "dtype": values.dtype.name,
+        "shape": list(values.shape),
+        "data": base64.b64encode(values.tobytes()).decode("ascii"),
+    }
+
+
+def encode_axis(axis):
+    """Describe an evenly spaced mesh axis by start, step and count"""
+    count = len(axis)
+    step = float(axis[1] - axis[0]) if count > 1 else 0.0
+    return {"start": float(axis[0]), "step": step, "count": count}
+
+
+def run_length_encode(flat):
+    """Split a 1-D array into run values and run lengths"""
+    if len(flat) == 0:
+        return flat, np.zeros(0, dtype=np.uint32)
+    starts = np.r_[0, np.flatnonzero(flat[1:] != flat[:-1]) + 1]
+    lengths = np.diff(np.r_[starts, len(flat)])
+    return flat[starts], lengths.astype(np.uint32)
+
+
+def encode_labels(values, classification=True):
+    """Pack a label array as class indices, run-length encoded when smaller
+
+    Regression targets are sent as float32 since they have no class table.
+    """
+    values = np.asarray(values)
+    if not classification:
+        encoded = encode_typed(values, np.float32)
+        encoded.update({"encoding": "raw", "classes": None})
+        return encoded
+
+    classes, indices = np.unique(values, return_inverse=True)
+    index_dtype = np.uint8 if len(classes) <= 256 else np.uint16
+    indices = indices.reshape(values.shape).astype(index_dtype)
+
+    runs, lengths = run_length_encode(indices.ravel())
+    if runs.nbytes + lengths.nbytes < indices.nbytes:
+        encoded = encode_typed(runs)
+        encoded.update({
+            "shape": list(values.shape),
+            "encoding": "rle",
+            "lengths": encode_typed(lengths)["data"],
+        })
+    else:
+        encoded = encode_typed(indices)
+        encoded["encoding"] = "raw"
+
+    encoded["classes"] = classes.tolist()
+    return encoded
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+class PCAProjection:
+    """Standardized 2-D PCA of a feature matrix, used to plot models fitted on all features
+
+    Only the mean, scale and two components are kept, so transforming
+    points either way is a single matrix product.
+    """
+
+    # Rows used to fit the components of large datasets
+    max_fit_rows = 100_000
+
+    def __init__(self, mean, scale, components, explained_variance_ratio):
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.components = np.asarray(components, dtype=float)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=float)
+
+    @classmethod
+    def fit(cls, X):
+        """Fit the projection on (a sample of) X"""
+        from sklearn.decomposition import PCA
+
+        X = np.asarray(X)
+        if len(X) > cls.max_fit_rows:
+            rows = np.random.default_rng(0).choice(len(X), cls.max_fit_rows, replace=False)
+            X = X[np.sort(rows)]
+        X = X.astype(float)
+
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        # Constant features carry no variance; leave them unscaled
+        scale[scale == 0] = 1.0
+        pca = PCA(n_components=2, random_state=0).fit((X - mean) / scale)
+        return cls(mean, scale, pca.components_, pca.explained_variance_ratio_)
+
+    @property
+    def n_features(self) -> int:
+        return len(self.mean)
+
+    def transform(self, X):
+        """Project feature vectors to the 2-D plot plane"""
+        return ((np.asarray(X, dtype=float) - self.mean) / self.scale) @ self.components.T
+
+    def inverse_transform(self, points):
+        """Map plot-plane points back to feature vectors on the projection plane"""
+        return (np.asarray(points, dtype=float) @ self.components) * self.scale + self.mean
+
+    def describe(self) -> dict:
+        return {
+            "method": "pca",
+            "n_features": self.n_features,
+            "explained_variance_ratio": self.explained_variance_ratio.tolist()
+        }
+
+    def to_arrays(self) -> dict:
+        return {
+            "mean": self.mean,
+            "scale": self.scale,
+            "components": self.components,
+            "explained_variance_ratio": self.explained_variance_ratio
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(**{name: arrays[name] for name in (
+            "mean", "scale", "components", "explained_variance_ratio"
+        )})
+
+
+class ProjectedModel:
+    """View of a model fitted on all features that predicts plot-plane points
+
+    predict, predict_proba and decision_function take 2-D points, which are
+    mapped back to feature space first; other attributes are the model's.
+    """
+
+    _point_methods = ("predict", "predict_proba", "decision_function")
+
+    def __init__(self, model, projection: PCAProjection):
+        self.model = model
+        self.projection = projection
+
+    def __getattr__(self, name):
+        attribute = getattr(self.model, name)
+        if name in self._point_methods:
+            return lambda points: attribute(self.projection.inverse_transform(points))
+        return attribute
@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class ResultCache:
+    """Memory-bounded LRU cache of serialized responses
+
+    Values are the encoded response bytes, so their size is exact and a hit
+    can be sent without re-serializing. When ``directory`` is set, entries
+    are also written to disk and reloaded after a worker restart. Files are
+    kept within ``disk_max_bytes``: once over it, the least recently used
+    ones (by mtime) are removed until the directory is back to three
+    quarters of the budget.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, directory: Optional[str] = None,
+                 disk_max_bytes: int = 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+            self.evict_disk()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    value = f.read()
+            except OSError:
+                value = None
+            if value is not None:
+                self._store(key, value)
+                with self._lock:
+                    self.hits += 1
+                # Record the access so eviction keeps entries in use
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def record_miss(self):
+        """Count a lookup that could not use its cached entry, e.g. a stale one"""
+        with self._lock:
+            self.misses += 1
+
+    def put(self, key: str, value: bytes):
+        """Store bytes for key, evicting least recently used entries"""
+        self._store(key, value)
+
+        if self.directory:
+            # Write then rename so readers never see a partial file
+            if len(value) > self.disk_max_bytes:
+                return
+            path = self._path(key)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(value)
+                try:
+                    replaced = os.path.getsize(path)
+                except OSError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+            except OSError:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return
+
+            with self._lock:
+                self._disk_bytes += len(value) - replaced
+                over = self._disk_bytes > self.disk_max_bytes
+            if over:
+                self.evict_disk()
+
+    def _disk_entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict_disk(self):
+        """Remove the oldest files until the directory fits the disk budget"""
+        entries = self._disk_entries()
+        total = sum(size for _, size, _ in entries)
+        if total > self.disk_max_bytes:
+            target = self.disk_max_bytes * 3 // 4
+            for _, size, path in sorted(entries):
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    def _store(self, key: str, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous)
+
+            self._entries[key] = value
+            self._bytes += len(value)
+
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        """Return entry count, size and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk": self.directory is not None,
+                "disk_bytes": self._disk_bytes
+            }
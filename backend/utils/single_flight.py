@@ -0,0 +1,48 @@
+import asyncio
+
+
+class SingleFlight:
+    """Share one in-progress computation between concurrent callers of the same key
+
+    The first caller for a key starts the computation; callers arriving
+    while it runs await the same task and receive its result or exception.
+    The task is shielded, so a caller going away does not cancel it for
+    the others.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+    def run(self, key: str, compute) -> asyncio.Future:
+        """Return an awaitable result of compute(), shared with concurrent callers of key
+
+        compute is called right away when no computation for key is running,
+        so errors it raises before returning its coroutine reach this caller
+        only and nothing is shared.
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self.leaders += 1
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        else:
+            self.coalesced += 1
+        shared = asyncio.shield(task)
+        # Callers that only follow along (e.g. jobs streaming another job's
+        # events) never await it; errors reach them by other means
+        shared.add_done_callback(lambda f: f.cancelled() or f.exception())
+        return shared
+
+    def stats(self) -> dict:
+        """Return computations in progress and how many callers joined one"""
+        return {
+            "in_flight": len(self._tasks),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced
+        }
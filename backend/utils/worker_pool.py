@@ -0,0 +1,130 @@
+import asyncio
+import multiprocessing
+import os
+import queue
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional, Sequence
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the training queue is full"""
+
+
+def available_cpus() -> int:
+    """CPUs this process may use, honouring affinity and cgroup v2 quotas"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            count = min(count, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+class TrainingPool:
+    """Bounded process pool that keeps CPU-bound work off the event loop
+
+    At most ``max_pending`` calls may be running or queued at once; further
+    calls fail fast with PoolSaturatedError. With ``max_workers=0`` calls
+    run in the event loop's default thread pool instead, for platforms
+    where subprocesses are unavailable; the pool also falls back to this
+    mode when forkserver or process-shared semaphores are missing. By
+    default it starts one worker per available CPU, at most ``default_cap``.
+
+    Workers report progress back through ``events``, a queue handed to
+    ``initializer`` when each worker starts.
+    """
+
+    default_cap = 4
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 preload: Sequence[str] = (), initializer: Optional[Callable] = None):
+        self.max_workers = min(available_cpus(), self.default_cap) if max_workers is None else max_workers
+        self.preload = list(preload)
+        self.initializer = initializer
+        self._executor = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+        self._pending = 0
+
+        if self.max_workers > 0:
+            try:
+                # Workers fork from a clean server process that has already
+                # imported the task modules, rather than from the threaded app
+                self.context = multiprocessing.get_context("forkserver")
+                self.context.set_forkserver_preload(self.preload)
+                self.events = self.context.Queue()
+            except (ValueError, ImportError, OSError) as e:
+                # No forkserver on Windows; no sem_open on some serverless runtimes
+                warnings.warn(f"Worker processes unavailable ({e}); training in threads")
+                self.max_workers = 0
+        if self.max_workers == 0:
+            self.events = queue.Queue()
+        self.max_pending = max_pending or max(self.max_workers, 1) * 2
+
+    def _initialized_call(self, fn, *args):
+        # In-process mode: initialize on the first call, in its executor
+        # thread, so slow set-up (e.g. warming datasets) never blocks the loop
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized and self.initializer is not None:
+                    self.initializer(self.events)
+                self._initialized = True
+        return fn(*args)
+
+    def _get_executor(self):
+        if self.max_workers == 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=self.context,
+                initializer=self.initializer,
+                initargs=(self.events,)
+            )
+        return self._executor
+
+    def submit(self, fn, *args) -> asyncio.Future:
+        """Schedule fn(*args) in a worker, failing fast when the queue is full"""
+        if self._pending >= self.max_pending:
+            raise PoolSaturatedError("Training queue is full, try again shortly")
+
+        loop = asyncio.get_running_loop()
+        if self.max_workers == 0:
+            fn, args = self._initialized_call, (fn, *args)
+        future = loop.run_in_executor(self._get_executor(), fn, *args)
+        self._pending += 1
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: asyncio.Future):
+        self._pending -= 1
+        if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+            # A worker died (e.g. out of memory); start fresh on the next call
+            self._executor = None
+
+    async def run(self, fn, *args):
+        """Run fn(*args) in a worker and return its result"""
+        return await self.submit(fn, *args)
+
+    def stats(self) -> dict:
+        """Return worker count and queue occupancy"""
+        return {
+            "workers": self.max_workers,
+            "pending": self._pending,
+            "max_pending": self.max_pending
+        }
+
+    def shutdown(self):
+        """Stop worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -139,8 +139,14 @@ function Sidebar({
 
         {/* CSV Upload */}
         <DatasetUpload onUpload={(data) => {
-          console.log('Dataset uploaded:', data)
           alert(`Dataset uploaded! ${data.samples} samples, ${data.features} features`)
+          // The server keeps the upload, so train on it by id like any other dataset
+          onDatasetChange({
+            id: data.dataset_id,
+            name: 'Custom',
+            type: 'classification',
+            samples: data.samples,
+          })
         }} />
 
         {/* Info Box */}
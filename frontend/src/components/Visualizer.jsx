@@ -1,25 +1,85 @@
-import { useState } from 'react'
+import { useMemo, useRef, useState } from 'react'
 import { motion } from 'framer-motion'
 import Plot from 'react-plotly.js'
-import { trainModel } from '../utils/api'
+import { fetchBoundaryTile, trainModelStreaming } from '../utils/api'
+import { boundaryExtent, decodeBoundary, tilesInView } from '../utils/boundary'
 import TreeVisualization from './TreeVisualization'
 
+// The first boundary is coarse; zooming in fetches finer tiles of the view
+const INITIAL_BOUNDARY_RESOLUTION = 50
+
+// Visible range of one axis after a Plotly relayout, or null if unchanged
+const relayoutRange = (event, axis) => {
+  if (event[`${axis}.range[0]`] !== undefined) {
+    return [event[`${axis}.range[0]`], event[`${axis}.range[1]`]]
+  }
+  return event[`${axis}.range`] || null
+}
+
 function Visualizer({ algorithm, dataset, parameters }) {
   const [loading, setLoading] = useState(false)
   const [results, setResults] = useState(null)
   const [error, setError] = useState(null)
+  // Decoded tiles drawn in place of the coarse boundary while zoomed in
+  const [tiles, setTiles] = useState(null)
+  const view = useRef(null)
+  const tileRequest = useRef(0)
+  const boundary = useMemo(
+    () => (results?.decision_boundary ? decodeBoundary(results.decision_boundary) : null),
+    [results?.decision_boundary]
+  )
+  const extent = useMemo(() => (boundary ? boundaryExtent(boundary) : null), [boundary])
+
+  const resetTiles = () => {
+    // Responses of tile requests still in flight are dropped
+    tileRequest.current += 1
+    view.current = null
+    setTiles(null)
+  }
+
+  const handleRelayout = async (event) => {
+    if (!extent || !results?.model_id) return
+    if (event['xaxis.autorange'] || event['yaxis.autorange']) {
+      resetTiles()
+      return
+    }
+    const x = relayoutRange(event, 'xaxis')
+    const y = relayoutRange(event, 'yaxis')
+    if (!x && !y) return
+
+    const previous = view.current || extent
+    view.current = { x: x || previous.x, y: y || previous.y }
+    const request = ++tileRequest.current
+    try {
+      const responses = await Promise.all(
+        tilesInView(extent, view.current).map(tile =>
+          fetchBoundaryTile(results.model_id, tile.z, tile.x, tile.y)
+        )
+      )
+      if (request === tileRequest.current) {
+        setTiles(responses.length ? responses.map(decodeBoundary) : null)
+      }
+    } catch (err) {
+      // Tiles only refine the view, so keep showing the coarse boundary
+      console.error('Tile error:', err)
+    }
+  }
 
   const handleRunModel = async () => {
     if (!algorithm || !dataset) return
 
     setLoading(true)
     setError(null)
+    setResults(null)
+    resetTiles()
 
     try {
-      const data = await trainModel(algorithm.id, dataset.id, parameters)
-      setResults(data)
+      // Render each stage (metrics, boundary, curves, tree) as soon as it arrives
+      await trainModelStreaming(algorithm.id, dataset.id, parameters, (stage, data) => {
+        setResults(prev => ({ ...prev, ...data }))
+      }, { boundary_resolution: INITIAL_BOUNDARY_RESOLUTION })
     } catch (err) {
-      setError(err.response?.data?.detail || 'Failed to train model')
+      setError(err.response?.data?.detail || err.message || 'Failed to train model')
       console.error('Training error:', err)
     } finally {
       setLoading(false)
@@ -128,7 +188,7 @@ function Visualizer({ algorithm, dataset, parameters }) {
         >
           {/* Metrics */}
           <div className="grid grid-cols-3 gap-6">
-            {Object.entries(results.metrics).map(([key, value], index) => (
+            {Object.entries(results.metrics || {}).map(([key, value], index) => (
               <motion.div
                 key={key}
                 initial={{ opacity: 0, y: 20, scale: 0.9 }}
@@ -151,59 +211,67 @@ function Visualizer({ algorithm, dataset, parameters }) {
           </div>
 
           {/* Decision Boundary Plot */}
-          <motion.div
-            initial={{ opacity: 0, y: 20 }}
-            animate={{ opacity: 1, y: 0 }}
-            transition={{ delay: 0.3 }}
-            className="bg-gradient-to-br from-gray-800 to-gray-900 rounded-2xl shadow-2xl p-8 border-2 border-gray-700"
-          >
-            <div className="flex items-center justify-between mb-6">
-              <h3 className="text-2xl font-bold text-white flex items-center">
-                <span className="w-2 h-8 bg-gradient-to-b from-cyan-500 to-blue-600 rounded-full mr-3"></span>
-                Decision Boundary
-              </h3>
-              <span className="px-3 py-1 bg-green-600 text-white rounded-full text-xs font-bold shadow-lg">
-                Interactive
-              </span>
-            </div>
-            <Plot
-              data={[
-                {
-                  x: results.decision_boundary.x.flat(),
-                  y: results.decision_boundary.y.flat(),
-                  z: results.decision_boundary.z.flat(),
-                  type: 'contour',
-                  colorscale: 'Viridis',
-                  showscale: false,
-                  opacity: 0.6,
-                },
-                {
-                  x: results.decision_boundary.data_points.X.map(p => p[0]),
-                  y: results.decision_boundary.data_points.X.map(p => p[1]),
-                  mode: 'markers',
-                  type: 'scatter',
-                  marker: {
-                    color: results.decision_boundary.data_points.y,
-                    size: 8,
-                    colorscale: 'Portland',
-                    line: { color: 'white', width: 1 },
+          {boundary && (
+            <motion.div
+              initial={{ opacity: 0, y: 20 }}
+              animate={{ opacity: 1, y: 0 }}
+              transition={{ delay: 0.3 }}
+              className="bg-gradient-to-br from-gray-800 to-gray-900 rounded-2xl shadow-2xl p-8 border-2 border-gray-700"
+            >
+              <div className="flex items-center justify-between mb-6">
+                <h3 className="text-2xl font-bold text-white flex items-center">
+                  <span className="w-2 h-8 bg-gradient-to-b from-cyan-500 to-blue-600 rounded-full mr-3"></span>
+                  Decision Boundary
+                </h3>
+                <span className="px-3 py-1 bg-green-600 text-white rounded-full text-xs font-bold shadow-lg">
+                  Interactive
+                </span>
+              </div>
+              <Plot
+                data={[
+                  ...(tiles || [boundary]).map(surface => ({
+                    x: surface.x,
+                    y: surface.y,
+                    z: surface.z,
+                    type: 'contour',
+                    colorscale: 'Viridis',
+                    // Tiles share the coarse boundary's colours
+                    zmin: extent.z[0],
+                    zmax: extent.z[1],
+                    showscale: false,
+                    opacity: 0.6,
+                  })),
+                  {
+                    x: boundary.points.x,
+                    y: boundary.points.y,
+                    mode: 'markers',
+                    type: 'scatter',
+                    marker: {
+                      color: boundary.points.labels,
+                      size: 8,
+                      colorscale: 'Portland',
+                      line: { color: 'white', width: 1 },
+                    },
+                    name: 'Data Points',
                   },
-                  name: 'Data Points',
-                },
-              ]}
-              layout={{
-                autosize: true,
-                paper_bgcolor: 'rgba(0,0,0,0)',
-                plot_bgcolor: 'rgba(0,0,0,0)',
-                xaxis: { title: 'Feature 1', gridcolor: '#374151' },
-                yaxis: { title: 'Feature 2', gridcolor: '#374151' },
-                font: { color: '#9CA3AF' },
-                margin: { l: 50, r: 50, t: 20, b: 50 },
-              }}
-              config={{ responsive: true }}
-              style={{ width: '100%', height: '500px' }}
-            />
-          </motion.div>
+                ]}
+                layout={{
+                  autosize: true,
+                  paper_bgcolor: 'rgba(0,0,0,0)',
+                  plot_bgcolor: 'rgba(0,0,0,0)',
+                  xaxis: { title: results.decision_boundary.projection ? 'Component 1' : 'Feature 1', gridcolor: '#374151' },
+                  yaxis: { title: results.decision_boundary.projection ? 'Component 2' : 'Feature 2', gridcolor: '#374151' },
+                  font: { color: '#9CA3AF' },
+                  margin: { l: 50, r: 50, t: 20, b: 50 },
+                  // Keep the zoom when tiles arrive; reset it for a new model
+                  uirevision: results.model_id,
+                }}
+                config={{ responsive: true }}
+                style={{ width: '100%', height: '500px' }}
+                onRelayout={handleRelayout}
+              />
+            </motion.div>
+          )}
 
           {/* Decision Tree Structure */}
           {results.tree_structure && (
@@ -19,13 +19,54 @@ export const fetchDatasets = async () => {
   return response.data
 }
 
-export const trainModel = async (algorithm, dataset, parameters) => {
+// options are extra /train fields, e.g. { all_features: true }
+export const trainModel = async (algorithm, dataset, parameters, options = {}) => {
   const response = await api.post('/train', {
     algorithm,
     dataset,
     parameters,
+    boundary_format: 'compact',
+    ...options,
   })
   return response.data
 }
 
+// Boundary of a trained model over one tile, as picked by tilesInView;
+// decode with decodeBoundary
+export const fetchBoundaryTile = async (modelId, z, x, y, size = 64) => {
+  const response = await api.get(`/models/${modelId}/tiles/${z}/${x}/${y}`, {
+    params: { size, boundary_format: 'compact' },
+  })
+  return response.data
+}
+
+const JOB_STAGES = ['metrics', 'decision_boundary', 'learning_curves', 'tree_structure']
+
+// Start a training job and call onStage(stage, data) as each stage finishes
+export const trainModelStreaming = async (algorithm, dataset, parameters, onStage, options = {}) => {
+  const response = await api.post('/jobs', {
+    algorithm,
+    dataset,
+    parameters,
+    boundary_format: 'compact',
+    ...options,
+  })
+
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`${API_BASE_URL}/jobs/${response.data.job_id}/events`)
+    JOB_STAGES.forEach(stage => {
+      source.addEventListener(stage, (event) => onStage(stage, JSON.parse(event.data)))
+    })
+    source.addEventListener('done', () => {
+      source.close()
+      resolve()
+    })
+    // Fired both for job errors (with data) and for lost connections
+    source.addEventListener('error', (event) => {
+      source.close()
+      reject(new Error(event.data ? JSON.parse(event.data).detail : 'Connection to the server was lost'))
+    })
+  })
+}
+
 export default api
@@ -0,0 +1,118 @@
+const TYPED_ARRAYS = {
+  uint8: Uint8Array,
+  uint16: Uint16Array,
+  uint32: Uint32Array,
+  float32: Float32Array,
+  float64: Float64Array,
+}
+
+const decodeBuffer = (data, dtype) => {
+  const bytes = Uint8Array.from(atob(data), c => c.charCodeAt(0))
+  return new TYPED_ARRAYS[dtype](bytes.buffer)
+}
+
+const axisValues = ({ start, step, count }) =>
+  Array.from({ length: count }, (_, i) => start + i * step)
+
+// Expand a packed label array back to class values
+const decodeLabels = (encoded) => {
+  let values = decodeBuffer(encoded.data, encoded.dtype)
+  if (encoded.encoding === 'rle') {
+    const lengths = decodeBuffer(encoded.lengths, 'uint32')
+    const total = lengths.reduce((sum, n) => sum + n, 0)
+    const expanded = new values.constructor(total)
+    let offset = 0
+    lengths.forEach((n, i) => {
+      expanded.fill(values[i], offset, offset + n)
+      offset += n
+    })
+    values = expanded
+  }
+  return encoded.classes ? Array.from(values, i => encoded.classes[i]) : Array.from(values)
+}
+
+const toRows = (flat, rows, cols) =>
+  Array.from({ length: rows }, (_, r) => flat.slice(r * cols, (r + 1) * cols))
+
+// Confidence surfaces are quantized to bytes; value = byte * scale
+const decodeSurface = (encoded, rows, cols) =>
+  encoded ? toRows(Array.from(decodeBuffer(encoded.data, encoded.dtype), v => v * encoded.scale), rows, cols) : null
+
+const decodePoints = (points) => {
+  if (!points) return null
+  if (!points.X.data) {
+    return {
+      x: points.X.map(p => p[0]),
+      y: points.X.map(p => p[1]),
+      labels: points.y,
+    }
+  }
+  const X = decodeBuffer(points.X.data, points.X.dtype)
+  const [count, width] = points.X.shape
+  return {
+    x: Array.from({ length: count }, (_, i) => X[i * width]),
+    y: Array.from({ length: count }, (_, i) => X[i * width + 1]),
+    labels: decodeLabels(points.y),
+  }
+}
+
+// Normalise either boundary format to { x, y, z, points } for Plotly;
+// points is null for tiles, which carry no data points
+export const decodeBoundary = (boundary) => {
+  if (boundary.format !== 'compact') {
+    return {
+      x: boundary.x.flat(),
+      y: boundary.y.flat(),
+      z: boundary.z.flat(),
+      confidence: boundary.confidence ? boundary.confidence.flat() : null,
+      margin: boundary.margin ? boundary.margin.flat() : null,
+      points: decodePoints(boundary.data_points),
+    }
+  }
+
+  const [rows, cols] = boundary.z.shape
+  return {
+    x: axisValues(boundary.x_axis),
+    y: axisValues(boundary.y_axis),
+    z: toRows(decodeLabels(boundary.z), rows, cols),
+    confidence: decodeSurface(boundary.confidence, rows, cols),
+    margin: decodeSurface(boundary.margin, rows, cols),
+    points: decodePoints(boundary.data_points),
+  }
+}
+
+// Extent of a decoded boundary's mesh and the range of its values
+export const boundaryExtent = (boundary) => {
+  const z = boundary.z.flat()
+  return {
+    x: [boundary.x[0], boundary.x[boundary.x.length - 1]],
+    y: [boundary.y[0], boundary.y[boundary.y.length - 1]],
+    z: z.reduce(([lo, hi], v) => [Math.min(lo, v), Math.max(hi, v)], [Infinity, -Infinity]),
+  }
+}
+
+const MAX_TILE_ZOOM = 12
+
+// Tiles { z, x, y } covering a view of a mesh extent, each about half as
+// wide as the view along its less zoomed axis; matches /models/{id}/tiles
+export const tilesInView = (extent, view) => {
+  const axes = ['x', 'y']
+  const span = axis => extent[axis][1] - extent[axis][0]
+  if (axes.some(axis => view[axis][1] < extent[axis][0] || view[axis][0] > extent[axis][1])) {
+    return []
+  }
+
+  const zoom = Math.min(...axes.map(axis => Math.log2(2 * span(axis) / (view[axis][1] - view[axis][0]))))
+  const z = Math.min(MAX_TILE_ZOOM, Math.max(1, Math.ceil(zoom)))
+  const count = 2 ** z
+  const index = (axis, value) =>
+    Math.min(count - 1, Math.max(0, Math.floor((value - extent[axis][0]) / span(axis) * count)))
+
+  const tiles = []
+  for (let x = index('x', view.x[0]); x <= index('x', view.x[1]); x++) {
+    for (let y = index('y', view.y[0]); y <= index('y', view.y[1]); y++) {
+      tiles.push({ z, x, y })
+    }
+  }
+  return tiles
+}